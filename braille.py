@@ -0,0 +1,25 @@
+"""
+Braill'ie - Braille Map
+========================
+6-dot cell bits for each character (bit 0 = dot 1 ... bit 5 = dot 6).
+Shared by the GUI, the position server and cell_link.py.
+"""
+
+# ─────────────────────────────────────────
+# BRAILLE MAP
+# ─────────────────────────────────────────
+BRAILLE_MAP = {
+    'a':0b000001,'b':0b000011,'c':0b001001,'d':0b011001,'e':0b010001,
+    'f':0b001011,'g':0b011011,'h':0b010011,'i':0b001010,'j':0b011010,
+    'k':0b000101,'l':0b000111,'m':0b001101,'n':0b011101,'o':0b010101,
+    'p':0b001111,'q':0b011111,'r':0b010111,'s':0b001110,'t':0b011110,
+    'u':0b100101,'v':0b100111,'w':0b011010,'x':0b101101,'y':0b111101,
+    'z':0b110101,' ':0b000000,
+}
+
+def char_to_braille_bits(ch):
+    return BRAILLE_MAP.get(ch.lower(), 0b000000)
+
+def text_to_cells(text):
+    # One byte of cell bits per character
+    return bytes(char_to_braille_bits(ch) for ch in text)
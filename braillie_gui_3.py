@@ -8,16 +8,22 @@ Install:
 
 Run:
     python braillie_gui.py
+    python braillie_gui.py --watchdog        # log Tk loop stalls
+
+Diagnostics (any time):
+    F9   start / stop cProfile capture
+    F10  start / stop tracemalloc capture
 """
 
+import argparse
+import sqlite3
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import threading
-import asyncio
-import json
+import time
+import tracemalloc
 
 try:
-    import websockets
+    from ws_client import WSClient
     WS_AVAILABLE = True
 except ImportError:
     WS_AVAILABLE = False
@@ -35,20 +41,20 @@ try:
 except ImportError:
     SERIAL_AVAILABLE = False
 
-# ─────────────────────────────────────────
-# BRAILLE MAP
-# ─────────────────────────────────────────
-BRAILLE_MAP = {
-    'a':0b000001,'b':0b000011,'c':0b001001,'d':0b011001,'e':0b010001,
-    'f':0b001011,'g':0b011011,'h':0b010011,'i':0b001010,'j':0b011010,
-    'k':0b000101,'l':0b000111,'m':0b001101,'n':0b011101,'o':0b010101,
-    'p':0b001111,'q':0b011111,'r':0b010111,'s':0b001110,'t':0b011110,
-    'u':0b100101,'v':0b100111,'w':0b011010,'x':0b101101,'y':0b111101,
-    'z':0b110101,' ':0b000000,
-}
+from braille import char_to_braille_bits
+from gui_diagnostics import StallMonitor, Profiler
+
+try:
+    from shm_position import PositionReader, FLAG_DONE, FLAG_CELL
+    SHM_AVAILABLE = True
+except ImportError:
+    SHM_AVAILABLE = False
 
-def char_to_braille_bits(ch):
-    return BRAILLE_MAP.get(ch.lower(), 0b000000)
+try:
+    from document_library import DocumentLibrary
+    LIBRARY_AVAILABLE = True
+except ImportError:
+    LIBRARY_AVAILABLE = False
 
 # ─────────────────────────────────────────
 # PALETTE
@@ -209,6 +215,9 @@ class PDFScreen(Screen):
         super().__init__(parent)
         self.app = app
         self.pdf_text = ""
+        self.start_pos = 0
+        self.doc_id = None
+        self.hits = []
         self._build()
 
     def _build(self):
@@ -234,6 +243,35 @@ class PDFScreen(Screen):
                   relief="flat", padx=14, pady=8,
                   cursor="hand2", command=self._load).pack(side="right")
 
+        # Library search
+        lib = tk.Frame(self, bg=C["card"], padx=20, pady=10)
+        lib.pack(fill="x", padx=20, pady=(8,0))
+        srow = tk.Frame(lib, bg=C["card"])
+        srow.pack(fill="x")
+        tk.Label(srow, text="LIBRARY", font=("Courier",8),
+                 bg=C["card"], fg=C["muted"]).pack(side="left")
+        self.query = tk.Entry(srow, bg=C["panel"], fg=C["text"],
+                               font=("Courier",10), relief="flat",
+                               insertbackground=C["accent"])
+        self.query.pack(side="left", fill="x", expand=True, padx=10)
+        self.query.bind("<Return>", lambda e: self._search())
+        tk.Button(srow, text="🔍  SEARCH",
+                  font=("Courier",9,"bold"),
+                  bg=C["border"], fg=C["text"],
+                  relief="flat", padx=10, pady=4,
+                  cursor="hand2", command=self._search).pack(side="right")
+        self.results = tk.Listbox(lib, height=4, bg=C["panel"], fg=C["text"],
+                                  font=("Courier",9), relief="flat",
+                                  selectbackground=C["accent"],
+                                  selectforeground=C["bg"],
+                                  highlightthickness=0, activestyle="none")
+        self.results.pack(fill="x", pady=(6,0))
+        self.results.bind("<<ListboxSelect>>", self._pick_hit)
+        self.results.bind("<Double-Button-1>", lambda e: self._start())
+        self.search_lbl = tk.Label(lib, text="", font=("Courier",8),
+                                    bg=C["card"], fg=C["muted"], anchor="w")
+        self.search_lbl.pack(fill="x")
+
         prev = tk.Frame(self, bg=C["bg"])
         prev.pack(fill="both", expand=True, padx=20, pady=(8,0))
         tk.Label(prev, text="EXTRACTED TEXT", font=("Courier",8),
@@ -270,29 +308,60 @@ class PDFScreen(Screen):
         if not path: return
         try:
             doc = fitz.open(path)
-            text = "".join(p.get_text() for p in doc)
+            pages = [p.get_text() for p in doc]
             doc.close()
-            self.pdf_text = text
-            self.textbox.delete("1.0", tk.END)
-            self.textbox.insert(tk.END, text)
             fname = path.replace("\\","/").split("/")[-1]
-            self.file_lbl.config(text=f"✔  {fname}", fg=C["green"])
-            self.count_lbl.config(text=f"{len(text)} chars")
-            self.app.ws_send({"cmd":"set_total","total":len(text)})
+            if self.app.library:
+                self.doc_id = self.app.library.add_document(path, pages, fname)
+            self._show_text("".join(pages), fname)
         except Exception as e:
             messagebox.showerror("PDF Error", str(e))
 
+    def _show_text(self, text, fname):
+        self.pdf_text = text
+        self.start_pos = 0
+        self.textbox.delete("1.0", tk.END)
+        self.textbox.insert(tk.END, text)
+        self.file_lbl.config(text=f"✔  {fname}", fg=C["green"])
+        self.count_lbl.config(text=f"{len(text)} chars")
+        self.app.ws_send({"cmd":"set_total","total":len(text)})
+        self.app.share_text()
+
+    def _search(self):
+        if not self.app.library:
+            messagebox.showwarning("Missing", "Document library unavailable")
+            return
+        t0 = time.perf_counter()
+        self.hits = self.app.library.search(self.query.get())
+        ms = (time.perf_counter() - t0) * 1000
+        self.results.delete(0, tk.END)
+        for h in self.hits:
+            self.results.insert(tk.END, f"{h['title']}  ·  {h['snippet']}")
+        self.search_lbl.config(text=f"{len(self.hits)} result(s) in {ms:.1f} ms")
+
+    def _pick_hit(self, event):
+        sel = self.results.curselection()
+        if not sel: return
+        h = self.hits[sel[0]]
+        if h["doc_id"] != self.doc_id:
+            self.doc_id = h["doc_id"]
+            self._show_text(self.app.library.get_text(h["doc_id"]), h["title"])
+        self.start_pos = h["position"]
+        self.textbox.see(f"1.0+{h['position']}c")
+        self.count_lbl.config(text=f"{len(self.pdf_text)} chars  ·  start at {h['position']}")
+
     def _start(self):
         if not self.pdf_text:
             messagebox.showwarning("No PDF", "Load a PDF first.")
             return
         self.app.pdf_text = self.pdf_text
-        self.app.go_to_reading()
+        self.app.go_to_reading(self.start_pos)
 
-    def set_ws(self, ok):
-        self.ws_lbl.config(
-            text="● WS Connected" if ok else "● WS Disconnected",
-            fg=C["green"] if ok else C["red"])
+    def set_ws(self, ok, rtt_ms=None):
+        text = "● WS Connected" if ok else "● WS Disconnected"
+        if ok and rtt_ms is not None:
+            text += f"  {rtt_ms:.0f} ms"
+        self.ws_lbl.config(text=text, fg=C["green"] if ok else C["red"])
 
 # ─────────────────────────────────────────
 # SCREEN 4 — READING
@@ -383,19 +452,22 @@ class ReadingScreen(Screen):
                                     bg=C["panel"], fg=C["muted"])
         self.status_lbl.pack(side="right", padx=16)
 
-    def load_text(self, text):
+    def load_text(self, text, pos=0):
         self.text = text
         self.tv.config(state="normal")
         self.tv.delete("1.0", tk.END)
         self.tv.insert(tk.END, text)
         self.tv.config(state="disabled")
-        self._update(0)
+        self._update(pos)
 
-    def update_position(self, pos):
+    def update_position(self, pos, bits=None):
+        # `bits`: the cell from the server's shared-memory block, if any
         if not self.text: return
-        pos = max(0, min(pos, len(self.text)-1))
+        if not 0 <= pos < len(self.text):
+            pos, bits = max(0, min(pos, len(self.text)-1)), None
         ch = self.text[pos]
-        bits = char_to_braille_bits(ch)
+        if bits is None:
+            bits = char_to_braille_bits(ch)
         self.cell.set_char(ch)
         self.char_lbl.config(text=ch if ch.strip() else "␣")
         self.bits_lbl.config(text=format(bits,'06b'))
@@ -437,11 +509,17 @@ class ReadingScreen(Screen):
         self.sim_btn.config(text="▶  SIMULATE GLOVE", bg=C["green"], fg=C["bg"])
         self.status_lbl.config(text="✔ Complete! Full text read.", fg=C["green"])
 
+    def set_running(self, running):
+        if running:
+            self.sim_btn.config(text="■  STOP SIM", bg=C["red"], fg="white")
+        else:
+            self.sim_btn.config(text="▶  SIMULATE GLOVE", bg=C["green"], fg=C["bg"])
+
 # ─────────────────────────────────────────
 # APP CONTROLLER
 # ─────────────────────────────────────────
 class BraillieApp:
-    def __init__(self, root):
+    def __init__(self, root, watchdog=False, stall_ms=150):
         self.root = root
         self.root.title("Braill'ie")
         self.root.geometry("820x560")
@@ -450,8 +528,8 @@ class BraillieApp:
         self.pdf_text   = ""
         self.serial_conn= None
         self.ws         = None
-        self.ws_loop    = None
-        self._ws_queue  = []
+        self.shm        = None    # PositionReader when the server is on this machine
+        self.library    = self._open_library()
 
         self.s_welcome   = WelcomeScreen(self.root, self.go_to_calibrate)
         self.s_calibrate = CalibrateScreen(self.root, self)
@@ -461,6 +539,34 @@ class BraillieApp:
         self.s_welcome.show()
         self._start_ws()
 
+        # Diagnostics
+        self.profiler = Profiler()
+        self.monitor  = StallMonitor(self.root, threshold_ms=stall_ms) if watchdog else None
+        if self.monitor:
+            self.monitor.start()
+        self.root.bind_all("<F9>",  lambda e: self.diag("profile"))
+        self.root.bind_all("<F10>", lambda e: self.diag("memory"))
+
+    def diag(self, action):
+        if action == "profile":
+            self.profiler.toggle_cpu()
+        elif action == "memory":
+            self.profiler.toggle_memory()
+        else:
+            return
+        busy = [n for n, v in (("cProfile", self.profiler.cpu),
+                               ("tracemalloc", tracemalloc.is_tracing())) if v]
+        self.root.title("Braill'ie" + (f"  [{' + '.join(busy)}]" if busy else ""))
+
+    def _open_library(self):
+        if not LIBRARY_AVAILABLE: return None
+        try:
+            return DocumentLibrary()
+        except (sqlite3.Error, OSError) as e:
+            # e.g. SQLite built without FTS5, or home directory read-only
+            print(f"[LIBRARY] Disabled: {e}")
+            return None
+
     def go_to_calibrate(self):
         self.s_welcome.hide()
         self.s_calibrate.show()
@@ -470,54 +576,91 @@ class BraillieApp:
         self.s_reading.hide()
         self.s_pdf.show()
 
-    def go_to_reading(self):
+    def go_to_reading(self, pos=0):
         self.s_pdf.hide()
-        self.s_reading.load_text(self.pdf_text)
+        self.s_reading.load_text(self.pdf_text, pos)
         self.s_reading.show()
+        if pos:
+            # Jumped in from a library search: update the cell now (the server
+            # does not echo a position it already has) and move the server too
+            self.s_reading.update_position(pos)
+            self.ws_send({"cmd":"set_position","position":pos})
 
     # WebSocket
     def _start_ws(self):
         if not WS_AVAILABLE: return
-        threading.Thread(target=self._ws_thread, daemon=True).start()
-
-    def _ws_thread(self):
-        self.ws_loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.ws_loop)
-        self.ws_loop.run_until_complete(self._ws_run())
-
-    async def _ws_run(self):
-        while True:
-            try:
-                async with websockets.connect("ws://localhost:8765") as ws:
-                    self.ws = ws
-                    self.root.after(0, lambda: self.s_pdf.set_ws(True))
-                    while self._ws_queue:
-                        await ws.send(json.dumps(self._ws_queue.pop(0)))
-                    async for msg in ws:
-                        self.root.after(0, self._on_msg, json.loads(msg))
-            except Exception:
-                self.ws = None
-                self.root.after(0, lambda: self.s_pdf.set_ws(False))
-                await asyncio.sleep(2)
+        self.ws = WSClient("ws://localhost:8765",
+                           post=lambda f, *a: self.root.after(0, f, *a),
+                           on_message=self._on_msg,
+                           on_status=self._on_ws_status)
+        self.ws.start()
+        self._poll_shm()
+
+    def _on_ws_status(self, ok, rtt_ms):
+        self.s_pdf.set_ws(ok, rtt_ms)
+        if not ok:
+            self._attach_shm(None)
 
     def _on_msg(self, data):
         t = data.get("type")
         if t == "position":
+            # Only what didn't fit the shared-memory block, once attached
             self.s_reading.update_position(data["position"])
+        elif t == "state":
+            # Sent by the server on every (re)connect: resync
+            self._attach_shm(data.get("shm"))
+            self.s_reading.update_position(data.get("position", 0))
+            self.s_reading.set_running(data.get("running", False))
         elif t == "done":
+            # Usually read from shared memory instead (see _poll_shm)
             self.s_reading.on_done()
+        elif t == "diag":
+            self.diag(data.get("action"))
 
     def ws_send(self, msg):
-        if self.ws and self.ws_loop:
-            asyncio.run_coroutine_threadsafe(
-                self.ws.send(json.dumps(msg)), self.ws_loop)
-        else:
-            self._ws_queue.append(msg)
+        if self.ws:
+            self.ws.send(msg)
+
+    # Shared-memory fast path (server run with --shm on this machine)
+    def _attach_shm(self, name):
+        if self.shm:
+            self.shm.close()
+            self.shm = None
+        if name and SHM_AVAILABLE:
+            try:
+                self.shm = PositionReader(name)
+            except (OSError, ValueError):
+                self.shm = None   # server is on another machine
+                return
+            # Server stops sending us position / done over WebSocket
+            self.ws_send({"cmd":"shm_attach"})
+            self.share_text()
+
+    def share_text(self):
+        # Once per document: the server puts its cell bits in the block
+        if self.shm and self.s_pdf.pdf_text:
+            self.ws_send({"cmd":"set_text","text":self.s_pdf.pdf_text})
+
+    def _poll_shm(self):
+        if self.shm:
+            data = self.shm.read()
+            if data is not None:
+                pos, bits, flags = data
+                self.s_reading.update_position(pos, bits if flags & FLAG_CELL else None)
+                if flags & FLAG_DONE:
+                    self.s_reading.on_done()
+        self.root.after(16, self._poll_shm)   # ~60 Hz, once per frame
 
 # ─────────────────────────────────────────
 # ENTRY
 # ─────────────────────────────────────────
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Braill'ie reader")
+    ap.add_argument("--watchdog", action="store_true",
+                    help="log Tk event-loop stalls with the callback that caused them")
+    ap.add_argument("--stall-ms", type=int, default=150,
+                    help="stall threshold for --watchdog (default 150 ms)")
+    args = ap.parse_args()
     root = tk.Tk()
-    app = BraillieApp(root)
+    app = BraillieApp(root, watchdog=args.watchdog, stall_ms=args.stall_ms)
     root.mainloop()
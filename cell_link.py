@@ -0,0 +1,104 @@
+"""
+Braill'ie - Cell Link (host side)
+==================================
+Talks to cell_player.py on the Pico: sends blocks of upcoming cells with
+their dwell times, plus flush / pause / resume / seek / query commands.
+See the protocol notes at the top of cell_player.py.
+
+Install:
+    pip install pyserial
+
+Example:
+    link = CellLink("COM5")          # or /dev/ttyACM0
+    sent = link.send_text(text, start=0, dwell_ms=400)   # as many as fit
+    ...
+    link.send_text(text, start=sent)                     # top up later
+
+Give Ctrl-C back to Thonny (stops the player, drops to the REPL):
+    python cell_link.py COM5 exit
+"""
+
+import struct
+import sys
+
+from braille import char_to_braille_bits
+
+try:
+    import serial
+    SERIAL_AVAILABLE = True
+except ImportError:
+    SERIAL_AVAILABLE = False
+
+SYNC      = 0xB7
+BLOCK_MAX = 256    # cells per frame (keeps frames well under 1 KB)
+CAPACITY  = 1024   # must match CAPACITY in cell_player.py
+
+# ─────────────────────────────────────────
+# FRAME ENCODERS
+# ─────────────────────────────────────────
+def frame(cmd, payload=b""):
+    return struct.pack("<BBH", SYNC, ord(cmd), len(payload)) + payload
+
+def cells_frame(start, cells):
+    """`cells` is a sequence of (bits, dwell_ms) pairs."""
+    body = b"".join(struct.pack("<BH", bits & 0x3F, dwell) for bits, dwell in cells)
+    return frame("C", struct.pack("<I", start) + body)
+
+def seek_frame(index):
+    return frame("S", struct.pack("<I", index))
+
+# ─────────────────────────────────────────
+# SERIAL LINK
+# ─────────────────────────────────────────
+class CellLink:
+    def __init__(self, port, baud=115200):
+        if not SERIAL_AVAILABLE:
+            raise RuntimeError("pip install pyserial")
+        self.ser = serial.Serial(port, baud, timeout=0.2)
+
+    def close(self):
+        self.ser.close()
+
+    def send_cells(self, start, cells):
+        for i in range(0, len(cells), BLOCK_MAX):
+            self.ser.write(cells_frame(start + i, cells[i:i + BLOCK_MAX]))
+
+    def send_text(self, text, start=0, dwell_ms=400, count=None,
+                  bits_for=char_to_braille_bits):
+        """Queue up to `count` cells of `text` from `start`, never more
+        than the Pico has free (a block that overruns a full buffer is
+        dropped). Returns how many were sent; top up later from there."""
+        status = self.query()
+        if status is None:
+            raise RuntimeError("cell player did not answer the query")
+        free = status[2]
+        count = free if count is None else min(count, free)
+        chunk = text[start:start + count]
+        self.send_cells(start, [(bits_for(ch), dwell_ms) for ch in chunk])
+        return len(chunk)
+
+    def flush(self):  self.ser.write(frame("F"))
+    def pause(self):  self.ser.write(frame("P"))
+    def resume(self): self.ser.write(frame("R"))
+    def exit(self):   self.ser.write(frame("X"))
+
+    def seek(self, index):
+        self.ser.write(seek_frame(index))
+
+    def query(self):
+        """Returns (index, buffered, free, paused) or None on timeout."""
+        self.ser.reset_input_buffer()
+        self.ser.write(frame("Q"))
+        for _ in range(5):
+            line = self.ser.readline().decode(errors="replace").split()
+            if line and line[0] == "ST":
+                idx, buffered, free, paused = map(int, line[1:5])
+                return idx, buffered, free, bool(paused)
+        return None
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[2] != "exit":
+        sys.exit("usage: python cell_link.py PORT exit")
+    link = CellLink(sys.argv[1])
+    link.exit()
+    link.close()
@@ -0,0 +1,227 @@
+# Braill'ie — Buffered Cell Player (Pico firmware)
+# Receives blocks of upcoming braille cells over USB serial into a ring
+# buffer and plays them on the 6 actuators from a 1 kHz hardware timer,
+# so every dwell time is exact to 1 ms no matter how busy the host is.
+#
+# Run this on Raspberry Pi Pico via Thonny (save as main.py to autostart)
+#
+# ─────────────────────────────────────────
+# SERIAL PROTOCOL  (host → Pico)
+# ─────────────────────────────────────────
+# A single byte 0x00-0x3F is a legacy "show this cell now" command
+# (same as the GUI's old one-byte-per-character stream): it flushes the
+# buffer and raises the dots immediately.
+#
+# Everything else is a frame:
+#   0xB7  <cmd>  <len lo> <len hi>  <payload (len bytes)>
+#
+#   'C'  cells   u32 start index, then N × (u8 bits, u16 dwell ms)
+#   'F'  flush   drop everything buffered, lower all dots
+#   'P'  pause   freeze on the current cell
+#   'R'  resume  continue playback
+#   'S'  seek    u32 index: jump there if buffered, else flush and
+#                wait for a block that starts at that index
+#   'Q'  query   reply with a status line
+#   'X'  exit    stop playback, turn Ctrl-C back on and drop to the
+#                REPL (Ctrl-C is off while running: 0x03 is cell data)
+#
+# All integers are little-endian. Blocks normally continue where the
+# previous one ended; overlapping cells already in the buffer are
+# skipped and a block that does not line up acts as a seek. When the
+# buffer is full, though, a block past the end is a top-up that
+# overran: it is dropped (and reported) instead of flushing what is
+# buffered. To jump elsewhere while full, send 'S' first.
+#
+# Pico → host, one text line per event:
+#   ST <index> <buffered> <free> <paused>   (reply to 'Q')
+#   UF <index>                              (buffer ran dry)
+#   OV <index>                              (buffer full: cells from
+#                                            <index> on were dropped)
+
+from machine import Pin, Timer
+import machine
+import micropython
+import select
+import sys
+import time
+from array import array
+
+# ─────────────────────────────────────────
+# CONFIG
+# ─────────────────────────────────────────
+ACTUATOR_PINS = (10, 11, 12, 13, 14, 15)   # GPIO for dots 1-6 (bit 0 = dot 1)
+CAPACITY      = 1024                       # cells held on the Pico
+TICK_HZ       = 1000                       # timer rate → 1 ms dwell resolution
+
+SYNC = 0xB7
+
+micropython.alloc_emergency_exception_buf(100)
+
+# ─────────────────────────────────────────
+# ACTUATORS
+# ─────────────────────────────────────────
+pins = tuple(Pin(n, Pin.OUT, value=0) for n in ACTUATOR_PINS)
+
+def show(bits):
+    for i in range(6):
+        pins[i].value((bits >> i) & 1)
+
+# ─────────────────────────────────────────
+# RING BUFFER
+# `written` only moves in the main loop,
+# `played` only in the timer, so neither
+# side needs a lock for normal operation.
+# ─────────────────────────────────────────
+cell_bits  = bytearray(CAPACITY)
+cell_dwell = array('H', bytes(2 * CAPACITY))
+
+written    = 0      # cells ever written
+played     = 0      # cells ever taken by the timer
+base_index = 0      # text index of cell number 0 in this run
+remaining  = 0      # ms left on the current cell
+current    = -1     # text index shown on the actuators
+paused     = False
+idle       = True   # timer has nothing to play
+starved    = False  # set by the timer, reported by the main loop
+
+# Runs in hard IRQ context: integers and
+# preallocated buffers only, no allocation.
+def tick(t):
+    global played, remaining, current, idle, starved
+    if paused:
+        return
+    if remaining > 1:
+        remaining -= 1
+        return
+    if played == written:
+        # Nothing queued: keep the last cell raised
+        remaining = 0
+        if not idle:
+            idle = True
+            starved = True
+        return
+    slot = played % CAPACITY
+    show(cell_bits[slot])
+    remaining = cell_dwell[slot]
+    current = base_index + played
+    played += 1
+    idle = False
+
+def flush(index):
+    global written, played, base_index, remaining, current, idle
+    state = machine.disable_irq()
+    written = 0
+    played = 0
+    base_index = index
+    remaining = 0
+    current = -1
+    idle = True
+    machine.enable_irq(state)
+    show(0)
+
+def seek(index):
+    global played, remaining
+    state = machine.disable_irq()
+    ok = base_index + played <= index < base_index + written
+    if ok:
+        played = index - base_index
+        remaining = 0   # next tick raises the target cell
+    machine.enable_irq(state)
+    if not ok:
+        flush(index)
+
+def add_cells(start, payload):
+    global written
+    n = (len(payload) - 4) // 3
+    expected = base_index + written
+    skip = 0
+    if start != expected:
+        if base_index + played <= start < expected:
+            skip = expected - start      # overlap with what we already have
+        elif start > expected and written - played >= CAPACITY:
+            print("OV", start)           # overran a full buffer: keep it
+            return
+        else:
+            flush(start)
+    for k in range(skip, n):
+        if written - played >= CAPACITY:
+            print("OV", start + k)       # full; host re-sends after a 'Q'
+            break
+        slot = written % CAPACITY
+        o = 4 + 3 * k
+        cell_bits[slot]  = payload[o] & 0x3F
+        cell_dwell[slot] = payload[o + 1] | (payload[o + 2] << 8)
+        written += 1
+
+# ─────────────────────────────────────────
+# SERIAL INPUT
+# ─────────────────────────────────────────
+stdin = sys.stdin.buffer
+poll = select.poll()
+poll.register(sys.stdin, select.POLLIN)
+
+def read_exact(n):
+    data = b""
+    while len(data) < n:
+        data += stdin.read(n - len(data))
+    return data
+
+def u32(b, o=0):
+    return b[o] | (b[o + 1] << 8) | (b[o + 2] << 16) | (b[o + 3] << 24)
+
+class Exit(Exception):
+    pass
+
+def handle_frame(cmd, payload):
+    global paused
+    if cmd == ord('C') and len(payload) >= 4:
+        add_cells(u32(payload), payload)
+    elif cmd == ord('F'):
+        flush(base_index + played)
+    elif cmd == ord('P'):
+        paused = True
+    elif cmd == ord('R'):
+        paused = False
+    elif cmd == ord('S') and len(payload) >= 4:
+        seek(u32(payload))
+    elif cmd == ord('Q'):
+        buffered = written - played
+        print("ST", current, buffered, CAPACITY - buffered, int(paused))
+    elif cmd == ord('X'):
+        raise Exit
+
+# ─────────────────────────────────────────
+# MAIN LOOP
+# ─────────────────────────────────────────
+# 0x03 is valid cell / frame data, so Ctrl-C is off while playing.
+# Leave with an 'X' frame (cell_link.py PORT exit); any error turns
+# it back on too. Ctrl-C still works for the first 2 s after start-up,
+# so Thonny's Stop can catch main.py after a reset.
+print("Braill'ie cell player starting (Ctrl-C within 2 s for the REPL)")
+time.sleep(2)
+micropython.kbd_intr(-1)
+timer = Timer(freq=TICK_HZ, mode=Timer.PERIODIC, callback=tick, hard=True)
+
+print("Braill'ie cell player ready")
+
+try:
+    while True:
+        if starved:
+            starved = False
+            print("UF", current)
+        if not poll.poll(5):
+            continue
+        b = stdin.read(1)[0]
+        if b < 0x40:
+            # Legacy single-cell command
+            flush(base_index + played)
+            show(b)
+        elif b == SYNC:
+            head = read_exact(3)
+            handle_frame(head[0], read_exact(head[1] | (head[2] << 8)))
+except Exit:
+    print("Braill'ie cell player stopped")
+finally:
+    timer.deinit()
+    show(0)
+    micropython.kbd_intr(3)
@@ -0,0 +1,192 @@
+"""
+Braill'ie - Document Library
+=============================
+Keeps every PDF you have loaded in a local SQLite database with an
+FTS5 full-text index, so any passage in any book can be found in
+milliseconds and opened at the exact character position.
+
+Used by braillie_gui.py. Can also be run on its own:
+    python document_library.py list
+    python document_library.py search "words to find"
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import time
+
+# ─────────────────────────────────────────
+# CONFIG
+# ─────────────────────────────────────────
+LIBRARY_PATH = os.path.join(os.path.expanduser("~"), ".braillie", "library.db")
+CHUNK_CHARS  = 2000   # long pages are split into chunks of about this size
+SNIPPET_CHARS = 40    # context shown either side of a search hit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id     INTEGER PRIMARY KEY,
+    path   TEXT UNIQUE,
+    title  TEXT,
+    chars  INTEGER,
+    added  REAL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    id     INTEGER PRIMARY KEY,
+    doc_id INTEGER REFERENCES documents(id) ON DELETE CASCADE,
+    start  INTEGER
+);
+CREATE INDEX IF NOT EXISTS chunks_doc ON chunks(doc_id, start);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+    body, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# ─────────────────────────────────────────
+# CHUNKING
+# Splits page texts into (start, body) pairs.
+# `start` is the character offset into the
+# joined text, i.e. the ReadingScreen position.
+# ─────────────────────────────────────────
+def split_chunks(pages, size=CHUNK_CHARS):
+    chunks = []
+    offset = 0
+    for page in pages:
+        i = 0
+        while i < len(page):
+            end = min(i + size, len(page))
+            if end < len(page):
+                # Break on whitespace so a word never straddles two chunks
+                cut = page.rfind(" ", i + size // 2, end)
+                if cut > i:
+                    end = cut + 1
+            chunks.append((offset + i, page[i:end]))
+            i = end
+        offset += len(page)
+    return chunks
+
+# ─────────────────────────────────────────
+# QUERY HELPERS
+# ─────────────────────────────────────────
+def query_terms(text):
+    return re.findall(r"\w+", text)
+
+def fts_query(terms):
+    # Quote every term so FTS5 operators typed by the user are taken
+    # literally; the last term is a prefix match for search-as-you-type.
+    quoted = ['"%s"' % t for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+def locate(body, terms):
+    # Offset of the first query term inside a chunk (0 if not found,
+    # e.g. when the match came from diacritic folding)
+    hits = [m.start() for m in
+            (re.search(r"\b" + re.escape(t), body, re.IGNORECASE) for t in terms)
+            if m]
+    return min(hits) if hits else 0
+
+def make_snippet(body, at):
+    a = max(0, at - SNIPPET_CHARS)
+    b = min(len(body), at + SNIPPET_CHARS)
+    s = " ".join(body[a:b].split())
+    return ("…" if a > 0 else "") + s + ("…" if b < len(body) else "")
+
+# ─────────────────────────────────────────
+# LIBRARY
+# ─────────────────────────────────────────
+class DocumentLibrary:
+    def __init__(self, path=LIBRARY_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def add_document(self, path, pages, title=None):
+        """Store a document (list of page texts), replacing any earlier
+        copy of the same file. Returns the document id."""
+        title = title or path.replace("\\", "/").split("/")[-1]
+        with self.conn:
+            self._delete(path)
+            cur = self.conn.execute(
+                "INSERT INTO documents (path, title, chars, added) VALUES (?,?,?,?)",
+                (path, title, sum(len(p) for p in pages), time.time()))
+            doc_id = cur.lastrowid
+            for start, body in split_chunks(pages):
+                cur = self.conn.execute(
+                    "INSERT INTO chunks (doc_id, start) VALUES (?,?)", (doc_id, start))
+                self.conn.execute(
+                    "INSERT INTO chunks_fts (rowid, body) VALUES (?,?)",
+                    (cur.lastrowid, body))
+        return doc_id
+
+    def remove_document(self, doc_id):
+        row = self.conn.execute(
+            "SELECT path FROM documents WHERE id = ?", (doc_id,)).fetchone()
+        if row:
+            with self.conn:
+                self._delete(row[0])
+
+    def _delete(self, path):
+        self.conn.execute(
+            "DELETE FROM chunks_fts WHERE rowid IN "
+            "(SELECT c.id FROM chunks c JOIN documents d ON d.id = c.doc_id "
+            " WHERE d.path = ?)", (path,))
+        self.conn.execute("DELETE FROM documents WHERE path = ?", (path,))
+
+    def documents(self):
+        rows = self.conn.execute(
+            "SELECT id, title, chars FROM documents ORDER BY added DESC")
+        return [{"doc_id": i, "title": t, "chars": n} for i, t, n in rows]
+
+    def get_text(self, doc_id):
+        rows = self.conn.execute(
+            "SELECT f.body FROM chunks c JOIN chunks_fts f ON f.rowid = c.id "
+            "WHERE c.doc_id = ? ORDER BY c.start", (doc_id,))
+        return "".join(r[0] for r in rows)
+
+    def search(self, text, limit=50):
+        """Best matches first. Each hit has the document, the absolute
+        character position of the match and a short snippet."""
+        terms = query_terms(text)
+        if not terms:
+            return []
+        rows = self.conn.execute(
+            "SELECT c.doc_id, d.title, c.start, f.body "
+            "FROM chunks_fts f "
+            "JOIN chunks c ON c.id = f.rowid "
+            "JOIN documents d ON d.id = c.doc_id "
+            "WHERE chunks_fts MATCH ? ORDER BY rank LIMIT ?",
+            (fts_query(terms), limit))
+        hits = []
+        for doc_id, title, start, body in rows:
+            at = locate(body, terms)
+            hits.append({
+                "doc_id":   doc_id,
+                "title":    title,
+                "position": start + at,
+                "snippet":  make_snippet(body, at),
+            })
+        return hits
+
+# ─────────────────────────────────────────
+# COMMAND LINE
+# ─────────────────────────────────────────
+if __name__ == "__main__":
+    lib = DocumentLibrary()
+    if len(sys.argv) >= 3 and sys.argv[1] == "search":
+        t0 = time.perf_counter()
+        hits = lib.search(" ".join(sys.argv[2:]))
+        ms = (time.perf_counter() - t0) * 1000
+        for h in hits:
+            print(f"{h['title']}  @{h['position']}  {h['snippet']}")
+        print(f"{len(hits)} hit(s) in {ms:.1f} ms")
+    else:
+        for d in lib.documents():
+            print(f"[{d['doc_id']}] {d['title']}  ({d['chars']} chars)")
+    lib.close()
@@ -0,0 +1,157 @@
+"""
+Braill'ie - GUI Diagnostics
+============================
+Optional helpers for finding out why the reader lags.
+
+StallMonitor
+    Heartbeat on the Tk loop via `after`. A watcher thread notices when
+    a beat is overdue and grabs the main thread's stack while it is still
+    blocked, so each stall over the threshold is logged together with the
+    Tk callback that caused it and the line it was stuck on.
+
+Profiler
+    cProfile and tracemalloc captures that can be toggled at runtime
+    (F9 / F10 in the GUI, or the server's "diag" command) and are dumped
+    to files when stopped.
+
+Used by braillie_gui.py:
+    python braillie_gui.py --watchdog --stall-ms 100
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+
+# ─────────────────────────────────────────
+# STALL MONITOR
+# ─────────────────────────────────────────
+class StallMonitor:
+    def __init__(self, root, interval_ms=50, threshold_ms=150, log=None):
+        self.root      = root
+        self.interval  = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.log       = log or (lambda s: print(s, file=sys.stderr))
+        self.main_id   = threading.get_ident()
+        self.running   = False
+        self.last_beat = 0.0
+        self.culprit   = None   # stack captured during the current stall
+        self.stalls    = 0
+        self.worst     = 0.0
+
+    def start(self):
+        self.running = True
+        self.last_beat = time.perf_counter()
+        self.root.after(int(self.interval * 1000), self._beat)
+        threading.Thread(target=self._watch, daemon=True).start()
+        self.log(f"[WATCHDOG] Monitoring Tk loop (stall > {self.threshold * 1000:.0f} ms)")
+
+    def stop(self):
+        self.running = False
+
+    def _beat(self):
+        if not self.running:
+            return
+        now = time.perf_counter()
+        late = now - self.last_beat - self.interval
+        if late > self.threshold:
+            self.stalls += 1
+            self.worst = max(self.worst, late)
+            self.log(f"[WATCHDOG] Tk loop stalled {late * 1000:.0f} ms"
+                     + (f"\n{self.culprit}" if self.culprit else ""))
+        # New beat first, then forget the stall: the watcher must not
+        # catch _beat itself and pin it on the next stall
+        self.last_beat = now
+        self.culprit = None
+        self.root.after(int(self.interval * 1000), self._beat)
+
+    def _watch(self):
+        while self.running:
+            time.sleep(self.threshold / 4)
+            beat = self.last_beat
+            overdue = time.perf_counter() - beat - self.interval
+            if overdue > self.threshold and self.culprit is None:
+                frame = sys._current_frames().get(self.main_id)
+                if frame is not None:
+                    stack = describe_stack(traceback.extract_stack(frame))
+                    if self.last_beat == beat:   # still the same stall
+                        self.culprit = stack
+
+TKINTER = os.path.join("tkinter", "__init__.py")
+
+def describe_stack(stack):
+    # The Tk callback is the first frame after tkinter's CallWrapper that
+    # isn't tkinter itself (after() wraps callbacks in its own `callit`)
+    callback = None
+    for i, fs in enumerate(stack):
+        if fs.name == "__call__" and fs.filename.endswith(TKINTER):
+            j = i + 1
+            while j < len(stack) and stack[j].filename.endswith(TKINTER):
+                j += 1
+            if j < len(stack):
+                callback = stack[j]
+    where = stack[-1]
+    lines = []
+    if callback:
+        lines.append(f"  callback: {callback.name}  ({_short(callback)})")
+    lines.append(f"  blocked:  {where.name}  ({_short(where)})")
+    if where.line:
+        lines.append(f"            {where.line}")
+    return "\n".join(lines)
+
+def _short(fs):
+    return f"{os.path.basename(fs.filename)}:{fs.lineno}"
+
+# ─────────────────────────────────────────
+# PROFILER
+# ─────────────────────────────────────────
+class Profiler:
+    def __init__(self, out_dir=".", log=None):
+        self.out_dir = out_dir
+        self.log     = log or (lambda s: print(s, file=sys.stderr))
+        self.cpu     = None
+
+    def _path(self, kind, ext):
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return os.path.join(self.out_dir, f"braillie_{kind}_{stamp}.{ext}")
+
+    def toggle_cpu(self):
+        """Start cProfile, or stop it and dump the stats. Returns True
+        while profiling."""
+        if self.cpu is None:
+            self.cpu = cProfile.Profile()
+            self.cpu.enable()
+            self.log("[PROFILE] cProfile started")
+            return True
+        self.cpu.disable()
+        path = self._path("profile", "prof")
+        self.cpu.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(self.cpu, stream=out).sort_stats("cumulative").print_stats(15)
+        self.cpu = None
+        self.log(f"[PROFILE] cProfile saved to {path}\n{out.getvalue()}")
+        return False
+
+    def toggle_memory(self):
+        """Start tracemalloc, or snapshot it, write the top allocation
+        sites and stop. Returns True while tracing."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self.log("[PROFILE] tracemalloc started")
+            return True
+        snap = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        path = self._path("tracemalloc", "txt")
+        with open(path, "w") as f:
+            f.write(f"current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n\n")
+            for stat in snap.statistics("lineno")[:30]:
+                f.write(f"{stat}\n")
+        self.log(f"[PROFILE] tracemalloc saved to {path} "
+                 f"(peak {peak / 1024:.1f} KiB)")
+        return False
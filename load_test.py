@@ -0,0 +1,241 @@
+"""
+Braill'ie - Position Server Load Test
+======================================
+Starts a local position_server.py and hammers it with simulated clients:
+
+- readers      connect and just receive broadcasts (like GUIs)
+- controllers  send set_position at --rate per second, and optionally
+               toggle start_sim / stop_sim at --sim-rate per second
+
+For each reader count it reports delivered message rate (all messages
+readers got), the share of set_position updates that reached every
+reader, end-to-end latency percentiles (controller send → reader
+receive) and server CPU.
+
+Install:
+    pip install websockets          (psutil optional, for non-Linux CPU)
+
+Run:
+    python load_test.py
+    python load_test.py --readers 10,100,300 --controllers 4 --rate 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import websockets
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+HERE   = os.path.dirname(os.path.abspath(__file__))
+STRIDE = 1000   # gap between sent positions, so simulated steps never collide
+
+# ─────────────────────────────────────────
+# SERVER PROCESS
+# ─────────────────────────────────────────
+def start_server(port, extra_args):
+    return subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "position_server.py"),
+         "--port", str(port), *extra_args],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+async def wait_for_server(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with websockets.connect(f"ws://localhost:{port}"):
+                return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"server did not start on port {port}")
+
+def cpu_seconds(pid):
+    # User + system CPU time of a process and its children (--workers)
+    if PSUTIL_AVAILABLE:
+        procs = [psutil.Process(pid)]
+        procs += procs[0].children(recursive=True)
+        return sum(p.cpu_times().user + p.cpu_times().system for p in procs)
+    try:
+        total = 0.0
+        for p in [pid] + _children(pid):
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        return total
+    except (OSError, IndexError, ValueError):
+        return None
+
+def _children(pid):
+    kids = []
+    for tid in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{tid}/children") as f:
+            kids += [int(k) for k in f.read().split()]
+    return kids + [g for k in kids for g in _children(k)]
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return float("nan")
+    i = min(len(sorted_vals) - 1, int(round(p / 100 * (len(sorted_vals) - 1))))
+    return sorted_vals[i]
+
+# ─────────────────────────────────────────
+# SIMULATED CLIENTS
+# ─────────────────────────────────────────
+class Run:
+    def __init__(self):
+        self.sent      = {}     # position → send time
+        self.seq       = 0
+        self.sent_n    = 0
+        self.received  = 0
+        self.latencies = []
+        self.errors    = 0
+        self.measuring = False
+
+async def reader(url, run, stop):
+    try:
+        async with websockets.connect(url, max_queue=None) as ws:
+            while not stop.is_set():
+                try:
+                    msg = await asyncio.wait_for(ws.recv(), 0.5)
+                except asyncio.TimeoutError:
+                    continue
+                now = time.perf_counter()
+                if not run.measuring:
+                    continue
+                run.received += 1
+                data = json.loads(msg)
+                if data.get("type") == "position":
+                    sent = run.sent.get(data["position"])
+                    if sent is not None:
+                        run.latencies.append(now - sent)
+    except (OSError, websockets.exceptions.WebSocketException):
+        run.errors += 1
+
+async def controller(url, run, stop, rate, sim_rate):
+    sim_on = False
+    next_sim = time.perf_counter()
+    try:
+        async with websockets.connect(url, max_queue=None) as ws:
+            # Drain broadcasts so the server never blocks on us
+            drain = asyncio.create_task(_drain(ws))
+            period = 1.0 / rate if rate else None
+            next_send = time.perf_counter()
+            while not stop.is_set():
+                now = time.perf_counter()
+                if period and now >= next_send:
+                    run.seq += 1
+                    pos = run.seq * STRIDE
+                    run.sent[pos] = time.perf_counter()
+                    if run.measuring:
+                        run.sent_n += 1
+                    await ws.send(json.dumps({"cmd": "set_position", "position": pos}))
+                    next_send += period
+                if sim_rate and now >= next_sim:
+                    sim_on = not sim_on
+                    await ws.send(json.dumps({"cmd": "start_sim" if sim_on else "stop_sim"}))
+                    next_sim += 1.0 / sim_rate
+                waits = [t for t in (next_send if period else None,
+                                     next_sim if sim_rate else None) if t]
+                await asyncio.sleep(max(0.0, min(waits) - time.perf_counter()) if waits else 0.1)
+            drain.cancel()
+    except (OSError, websockets.exceptions.WebSocketException):
+        run.errors += 1
+
+async def _drain(ws):
+    try:
+        async for _ in ws:
+            pass
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+# ─────────────────────────────────────────
+# ONE STEP
+# ─────────────────────────────────────────
+async def run_step(args, readers):
+    proc = start_server(args.port, args.server_args)
+    url = f"ws://localhost:{args.port}"
+    try:
+        await wait_for_server(args.port)
+        run, stop = Run(), asyncio.Event()
+        tasks = [asyncio.create_task(reader(url, run, stop)) for _ in range(readers)]
+        await asyncio.sleep(0.5 + readers / 500)   # let everyone connect
+        tasks += [asyncio.create_task(controller(url, run, stop, args.rate, args.sim_rate))
+                  for _ in range(args.controllers)]
+        await asyncio.sleep(args.warmup)
+
+        cpu0, me0, t0 = cpu_seconds(proc.pid), os.times(), time.perf_counter()
+        run.measuring = True
+        await asyncio.sleep(args.duration)
+        run.measuring = False
+        cpu1, me1, wall = cpu_seconds(proc.pid), os.times(), time.perf_counter() - t0
+
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    lat = sorted(run.latencies)
+    server_cpu = (cpu1 - cpu0) / wall * 100 if cpu0 is not None and cpu1 is not None else None
+    own_cpu = ((me1.user + me1.system) - (me0.user + me0.system)) / wall * 100
+    return {
+        "readers":    readers,
+        "sent":       run.sent_n / wall,
+        "delivered":  run.received / wall,
+        "ratio":      len(lat) / (run.sent_n * readers) * 100 if run.sent_n and readers else 0,
+        "p50":        percentile(lat, 50) * 1000,
+        "p95":        percentile(lat, 95) * 1000,
+        "p99":        percentile(lat, 99) * 1000,
+        "max":        (lat[-1] if lat else float("nan")) * 1000,
+        "server_cpu": server_cpu,
+        "own_cpu":    own_cpu,
+        "errors":     run.errors,
+    }
+
+# ─────────────────────────────────────────
+# MAIN
+# ─────────────────────────────────────────
+def print_row(r):
+    cpu = f"{r['server_cpu']:6.0f}%" if r["server_cpu"] is not None else "    n/a"
+    print(f"{r['readers']:>7}  {r['sent']:7.0f}  {r['delivered']:10.0f}  {r['ratio']:6.1f}%"
+          f"  {r['p50']:7.1f}  {r['p95']:7.1f}  {r['p99']:7.1f}  {r['max']:7.1f}"
+          f"  {cpu}  {r['own_cpu']:6.0f}%  {r['errors']:>4}")
+
+async def main(args):
+    print(f"controllers={args.controllers}  rate={args.rate}/s each  "
+          f"sim toggles={args.sim_rate}/s  {args.duration:.0f}s per step")
+    print(f"{'readers':>7}  {'sent/s':>7}  {'delivered/s':>10}  {'deliv':>7}"
+          f"  {'p50 ms':>7}  {'p95 ms':>7}  {'p99 ms':>7}  {'max ms':>7}"
+          f"  {'server':>7}  {'loadgen':>7}  {'errs':>4}")
+    for n in args.readers:
+        r = await run_step(args, n)
+        print_row(r)
+        if r["own_cpu"] > 90:
+            print("         ^ load generator is CPU-bound; latencies include its own queueing")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Load-test position_server.py")
+    ap.add_argument("--readers", default="1,10,50,100,200",
+                    type=lambda s: [int(x) for x in s.split(",")],
+                    help="comma-separated reader counts to step through")
+    ap.add_argument("--controllers", type=int, default=2)
+    ap.add_argument("--rate", type=float, default=20.0,
+                    help="set_position messages per second per controller")
+    ap.add_argument("--sim-rate", type=float, default=0.0,
+                    help="start_sim/stop_sim toggles per second per controller")
+    ap.add_argument("--duration", type=float, default=5.0, help="seconds measured per step")
+    ap.add_argument("--warmup", type=float, default=1.0)
+    ap.add_argument("--port", type=int, default=8799,
+                    help="port for the test server (not 8765, so a real one can keep running)")
+    ap.add_argument("--server-args", nargs=argparse.REMAINDER, default=[],
+                    help="extra arguments passed to position_server.py")
+    asyncio.run(main(ap.parse_args()))
@@ -6,20 +6,38 @@ Run this FIRST before opening the GUI.
 This file:
 - Holds the current character position variable
 - Simulates glove movement (auto-increments position)
+- Accepts raw glove positions and stabilizes them
 - Broadcasts position to GUI via WebSocket
+- Optionally records / replays sessions (session_log.py)
+- Optionally runs several worker processes on one port (--workers)
 
 Install:
     pip install websockets
 
 Run:
     python position_server.py
+    python position_server.py --record session.brl
+    python position_server.py --replay session.brl --speed 4
+    python position_server.py --workers 4        # Linux / macOS
+    python position_server.py --shm              # same-host GUI fast path
 """
 
+import argparse
 import asyncio
+import heapq
+import itertools
+import multiprocessing
+import signal
+import socket
 import websockets
 import json
 import time
 
+from braille import text_to_cells
+from position_stabilizer import PositionStabilizer
+from session_log import SessionRecorder, read_session
+from shm_position import PositionPublisher, block_name, FLAG_DONE, FLAG_CELL
+
 # ─────────────────────────────────────────
 # GLOBAL STATE
 # ─────────────────────────────────────────
@@ -31,14 +49,172 @@ state = {
 }
 
 connected_clients = set()
+recorder = None   # SessionRecorder when run with --record
+sim_task = None   # the running simulate_movement() task
+bus      = None   # StreamWriter to the worker hub in --workers mode
+owner    = True   # runs the simulation + stabilizer (only worker 0 with --workers)
+shm      = None   # PositionPublisher when run with --shm
+shm_clients = set()   # GUIs that read positions from shm instead of WebSocket
+cells    = b""    # cell bits of the loaded text (from "set_text")
+
+# ─────────────────────────────────────────
+# SERVER CLOCK
+# Everything time-based (stabilizer, glove
+# simulation) reads this instead of the wall
+# clock. While replaying, time is virtual: it
+# is set to each command's recorded timestamp
+# and steps through sleepers due in between,
+# in order, so a replay publishes the same
+# session at any speed. --speed only paces
+# those steps against the wall clock.
+# ─────────────────────────────────────────
+class Clock:
+    def __init__(self):
+        self.offset  = 0.0                # live time = monotonic + offset
+        self.virtual = None               # current time while replaying
+        self.pace    = 0.0                # replay speed, 0 = as fast as possible
+        self.anchor  = (0.0, 0.0)         # (virtual, monotonic) pacing counts from
+        self.timers  = []                 # (due, n, future) sleeping on virtual time
+        self.n       = itertools.count()
+
+    def now(self):
+        if self.virtual is not None:
+            return self.virtual
+        return time.monotonic() + self.offset
+
+    def start_replay(self, speed):
+        self.virtual = self.now()
+        self.pace    = speed
+        self.anchor  = (self.virtual, time.monotonic())
+
+    def end_replay(self):
+        # Back to live time, carrying on from where the replay stopped;
+        # pending sleepers are handed to the event loop
+        now = self.virtual
+        self.virtual = None
+        self.offset  = now - time.monotonic()
+        loop = asyncio.get_running_loop()
+        for due, _, fut in self.timers:
+            loop.call_later(max(0.0, due - now), _wake, fut)
+        self.timers.clear()
+
+    async def sleep(self, seconds):
+        if self.virtual is None:
+            await asyncio.sleep(seconds)
+            return
+        # At least 1 µs (the log's resolution), or a tiny wait would
+        # round away and the sleeper would spin at the same instant
+        due = self.virtual + max(seconds, 1e-6)
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.timers, (due, next(self.n), fut))
+        await fut
+
+    async def advance(self, t):
+        """Replay: move virtual time to t, waking every sleeper due
+        before it in order."""
+        while True:
+            for _ in range(3):
+                await asyncio.sleep(0)   # let new / woken tasks reach their next wait
+            # Only sleepers due strictly before t (within half a µs:
+            # sums of recorded deltas aren't exact in floats)
+            if not self.timers or self.timers[0][0] > t - 5e-7:
+                break
+            await self._pace(self.timers[0][0])
+            due, _, fut = heapq.heappop(self.timers)
+            self.virtual = max(self.virtual, due)
+            _wake(fut)
+        await self._pace(t)
+        self.virtual = max(self.virtual, t)
+
+    async def _pace(self, t):
+        # Let the wall clock catch up with virtual time t at `pace` ×
+        if self.pace:
+            v, m = self.anchor
+            wait = m + (t - v) / self.pace - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+def _wake(fut):
+    if not fut.done():
+        fut.set_result(None)
+
+clock = Clock()
+
+# ─────────────────────────────────────────
+# POSITION STABILIZER
+# Sits between raw glove positions ("sensor"
+# command) and broadcast: hysteresis, dwell,
+# dedup and a max update rate
+# ─────────────────────────────────────────
+STABILIZER = {
+    "hysteresis": 0.3,   # characters past a boundary before switching
+    "min_dwell":  0.03,  # seconds a new index must hold
+    "max_rate":   30.0,  # max position broadcasts per second
+}
+
+stabilizer = PositionStabilizer(**STABILIZER)
+stabilizer.reset(0)
+flush_pending = False
 
 # ─────────────────────────────────────────
 # BROADCAST to all connected GUIs
 # ─────────────────────────────────────────
-async def broadcast(message: dict):
-    if connected_clients:
+async def broadcast(message: dict, changed=()):
+    # `changed`: state fields this message reflects, for the other workers
+    if recorder:
+        recorder.record_out(message)
+    in_shm = shm is not None and write_shm(message)
+    publish(message, changed)
+    await send_local(message, skip_shm=in_shm)
+
+def write_shm(message):
+    # Same-host fast path: the GUI polls this block every frame.
+    # True if attached GUIs now have all of `message` from the block.
+    if message.get("type") == "done":
+        pos, flags = state["position"], FLAG_DONE
+    elif "position" in message:
+        pos, flags = message["position"], 0
+    else:
+        return False
+    # Only whole character indexes fit the block (i64); anything else
+    # still goes out over WebSocket as before
+    if type(pos) is not int or not -2**63 <= pos < 2**63:
+        return False
+    if 0 <= pos < len(cells):
+        shm.write(pos, cells[pos], flags | FLAG_CELL)
+    else:
+        shm.write(pos, 0, flags)
+    return message["type"] in ("position", "done")
+
+async def send_local(message, skip_shm=False):
+    # `skip_shm`: the message is in the shm block, so attached GUIs
+    # don't need it over WebSocket as well
+    clients = connected_clients - shm_clients if skip_shm else connected_clients
+    if clients:
         msg = json.dumps(message)
-        await asyncio.gather(*[ws.send(msg) for ws in connected_clients])
+        # One client closing mid-send must not stop the others getting it
+        await asyncio.gather(*[ws.send(msg) for ws in clients],
+                             return_exceptions=True)
+
+async def publish_position(pos):
+    # Dedup against what clients have, not just what the stabilizer sent
+    if pos == state["position"]:
+        return
+    state["position"] = pos
+    await broadcast({"type": "position", "position": pos}, ("position",))
+
+async def flush_stabilizer():
+    # Publishes a position the stabilizer held back, once it is allowed to
+    global flush_pending
+    while True:
+        wait = stabilizer.wait(clock.now())
+        if wait is None:
+            break
+        await clock.sleep(wait)
+        pos = stabilizer.poll(clock.now())
+        if pos is not None:
+            await publish_position(pos)
+    flush_pending = False
 
 # ─────────────────────────────────────────
 # HANDLE MESSAGES FROM GUI
@@ -53,46 +229,94 @@ async def handler(websocket):
     try:
         async for message in websocket:
             data = json.loads(message)
-            cmd = data.get("cmd")
-
-            if cmd == "calibrate":
-                # User moved glove to top-left, reset origin
-                state["position"] = 0
-                state["calibrated"] = True
-                print("[SERVER] Calibrated! Origin set to position 0.")
-                await broadcast({"type": "calibrated", "position": 0})
-
-            elif cmd == "set_total":
-                # GUI tells server how many chars are in the PDF
-                state["total_chars"] = data.get("total", 0)
-                print(f"[SERVER] Total chars set to {state['total_chars']}")
-
-            elif cmd == "start_sim":
-                # Start simulating glove movement
-                state["running"] = True
-                print("[SERVER] Simulation started.")
-                asyncio.create_task(simulate_movement())
-
-            elif cmd == "stop_sim":
-                state["running"] = False
-                print("[SERVER] Simulation stopped.")
-
-            elif cmd == "reset":
-                state["position"] = 0
-                state["running"] = False
-                await broadcast({"type": "position", "position": 0})
-
-            elif cmd == "set_position":
-                # Manual override (for testing)
-                state["position"] = data.get("position", 0)
-                await broadcast({"type": "position", "position": state["position"]})
-
+            if data.get("cmd") == "shm_attach":
+                # This GUI reads positions from shared memory from now on
+                if shm:
+                    shm_clients.add(websocket)
+                continue
+            await handle_command(data)
     except websockets.exceptions.ConnectionClosed:
         pass
     finally:
         connected_clients.discard(websocket)
+        shm_clients.discard(websocket)
         print(f"[SERVER] GUI disconnected. Total clients: {len(connected_clients)}")
 
+async def handle_command(data):
+    global flush_pending, sim_task, cells
+    if recorder:
+        recorder.record_in(data)
+    cmd = data.get("cmd")
+
+    if cmd in OWNED and not owner:
+        # The simulation and stabilizer live in one worker: hand it over
+        bus_send("cmd", data=data)
+        return
+
+    if cmd == "calibrate":
+        # User moved glove to top-left, reset origin
+        state["position"] = 0
+        state["calibrated"] = True
+        stabilizer.reset(0)
+        print("[SERVER] Calibrated! Origin set to position 0.")
+        await broadcast({"type": "calibrated", "position": 0}, ("position", "calibrated"))
+
+    elif cmd == "set_total":
+        # GUI tells server how many chars are in the PDF
+        state["total_chars"] = data.get("total", 0)
+        publish(changed=("total_chars",))
+        print(f"[SERVER] Total chars set to {state['total_chars']}")
+
+    elif cmd == "set_text":
+        # Full text (sent once per document), so the shared-memory block
+        # can carry cell bits
+        text = data.get("text", "")
+        cells = text_to_cells(text)
+        state["total_chars"] = len(text)
+        publish(changed=("total_chars",))
+        if shm:
+            write_shm({"type": "position", "position": state["position"]})
+        print(f"[SERVER] Text received: {len(text)} chars")
+
+    elif cmd == "start_sim":
+        # Start simulating glove movement (one loop, however often it's asked)
+        state["running"] = True
+        publish(changed=("running",))
+        print("[SERVER] Simulation started.")
+        if sim_task is None or sim_task.done():
+            sim_task = asyncio.create_task(simulate_movement())
+
+    elif cmd == "stop_sim":
+        state["running"] = False
+        publish(changed=("running",))
+        print("[SERVER] Simulation stopped.")
+
+    elif cmd == "reset":
+        state["position"] = 0
+        state["running"] = False
+        stabilizer.reset(0)
+        await broadcast({"type": "position", "position": 0}, ("position", "running"))
+
+    elif cmd == "set_position":
+        # Manual override (testing, library jumps)
+        pos = data.get("position", 0)
+        stabilizer.reset(pos)
+        await publish_position(pos)
+
+    elif cmd == "diag":
+        # Toggle GUI profiling: action = "profile" (cProfile) or "memory" (tracemalloc)
+        print(f"[SERVER] Diagnostics: {data.get('action')}")
+        await broadcast({"type": "diag", "action": data.get("action")})
+
+    elif cmd == "sensor":
+        # Raw fused glove position (float, in characters)
+        pos = stabilizer.update(data.get("value", 0.0), clock.now())
+        if pos is not None:
+            await publish_position(pos)
+        elif stabilizer.candidate is not None and not flush_pending:
+            flush_pending = True
+            asyncio.create_task(flush_stabilizer())
+
 # ─────────────────────────────────────────
 # SIMULATE GLOVE MOVEMENT
 # Increments position like the glove is
@@ -103,25 +327,222 @@ async def simulate_movement():
     while state["running"]:
         if state["total_chars"] > 0 and state["position"] >= state["total_chars"] - 1:
             state["running"] = False
-            await broadcast({"type": "done"})
+            await broadcast({"type": "done"}, ("running",))
             print("[SERVER] Reached end of text.")
             break
 
         state["position"] += 1
-        await broadcast({"type": "position", "position": state["position"]})
-        await asyncio.sleep(0.4)  # ~400ms per character (adjust to match actuator speed)
+        stabilizer.reset(state["position"])   # the glove is "here" now
+        await broadcast({"type": "position", "position": state["position"]}, ("position",))
+        await clock.sleep(0.4)  # ~400ms per character (adjust to match actuator speed)
+
+# ─────────────────────────────────────────
+# REPLAY A RECORDED SESSION
+# Feeds every recorded incoming command back
+# through handle_command at `speed` × real
+# time (0 = as fast as possible), on the
+# server clock's virtual time
+# ─────────────────────────────────────────
+async def replay(path, speed):
+    print(f"[SERVER] Replaying {path} at {speed or 'max'}×...")
+    start = time.monotonic()
+    clock.start_replay(speed)
+    begin = clock.now()
+    first = None
+    count = 0
+    for t, direction, data in read_session(path):
+        if direction == "session":
+            # Another recording appended to the same file: its clock
+            # starts over, and its idle start is skipped too
+            first, begin = None, clock.now()
+            continue
+        if direction != "in":
+            continue
+        if first is None:
+            first = t   # skip the idle time before the first command
+        # Handle each command at its recorded time, so the stabilizer
+        # sees the session's timing and not this run's scheduling
+        await clock.advance(begin + (t - first))
+        await handle_command(data)
+        count += 1
+    clock.end_replay()   # back to real time for live clients
+    print(f"[SERVER] Replay done: {count} commands in {time.monotonic() - start:.2f}s")
+
+# ─────────────────────────────────────────
+# MULTI-WORKER MODE
+# Each worker is a full server process on the
+# same port (SO_REUSEPORT; the kernel spreads
+# connections). A hub in the parent relays
+# state changes / broadcasts between workers
+# as JSON lines over loopback TCP. Worker 0
+# owns the simulation and stabilizer; the
+# others forward the commands that drive them.
+#
+# Bus lines, by "type":
+#   hello  {worker}       first line from each worker
+#   sync   {state, msg}   changed state fields + message to fan out
+#   cmd    {data}         command for the owner (worker 0) only
+# ─────────────────────────────────────────
+OWNED = {"calibrate", "reset", "set_position", "start_sim", "stop_sim", "sensor"}
+
+def bus_send(kind, **fields):
+    bus.write((json.dumps({"type": kind, **fields}) + "\n").encode())
+
+def publish(message=None, changed=()):
+    # Tell the other workers which state fields changed (only those, so an
+    # older value elsewhere is never rolled back) and what our clients got
+    if bus:
+        bus_send("sync", state={k: state[k] for k in changed}, msg=message)
+
+async def listen_bus(reader):
+    while line := await reader.readline():
+        data = json.loads(line)
+        if data["type"] == "cmd":
+            # Forwarded to us, the owner, by another worker
+            try:
+                await handle_command(data["data"])
+            except Exception as e:
+                print(f"[SERVER] Forwarded command failed: {e!r}")
+        elif data["type"] == "sync":
+            state.update(data["state"])
+            if data["msg"]:
+                await send_local(data["msg"])
+    print("[SERVER] Lost the worker hub, exiting.")
+
+async def run_hub(args):
+    writers = set()
+    owners  = []   # worker 0's connection
+
+    async def relay(reader, writer):
+        hello = await reader.readline()
+        if not hello:
+            return
+        if json.loads(hello)["worker"] == 0:
+            owners[:] = [writer]
+        writers.add(writer)
+        try:
+            while line := await reader.readline():
+                data = json.loads(line)
+                if data["type"] == "cmd":
+                    # Forwarded command: only the owner runs it
+                    if not owners:
+                        print(f"[HUB] No owner worker (not up yet, or died): "
+                              f"dropped {data['data'].get('cmd')!r}")
+                    for w in owners:
+                        w.write(line)
+                    continue
+                for w in writers:
+                    if w is not writer:
+                        w.write(line)
+        except (asyncio.CancelledError, ConnectionError):
+            pass   # shutting down, or the worker died
+        finally:
+            writers.discard(writer)
+            if writer in owners:
+                owners.clear()
+
+    hub = await asyncio.start_server(relay, "127.0.0.1", 0)
+    hub_port = hub.sockets[0].getsockname()[1]
+
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=worker_entry, args=(args, hub_port, i), daemon=True)
+               for i in range(args.workers)]
+    for w in workers:
+        w.start()
+
+    print("=" * 45)
+    print("  Braill'ie Position Server")
+    print(f"  WebSocket running on ws://{args.host}:{args.port}")
+    print(f"  {args.workers} worker processes")
+    print("  Waiting for GUI to connect...")
+    print("=" * 45)
+
+    stop = asyncio.get_running_loop().create_future()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.cancel)
+    except (NotImplementedError, AttributeError):
+        pass
+    try:
+        async with hub:
+            await stop
+    finally:
+        for w in workers:
+            w.terminate()
+        for w in workers:
+            w.join()
+
+def worker_entry(args, hub_port, index):
+    try:
+        asyncio.run(main(args, hub_port, index))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
 
 # ─────────────────────────────────────────
 # MAIN
 # ─────────────────────────────────────────
-async def main():
+async def main(args, hub_port=None, index=0):
+    global recorder, bus, shm, owner
+    if hub_port:
+        reader, bus = await asyncio.open_connection("127.0.0.1", hub_port)
+        owner = index == 0
+        bus_send("hello", worker=index)
+        async with websockets.serve(handler, args.host, args.port, reuse_port=True):
+            await listen_bus(reader)  # until the hub goes away
+        return
+    if args.record:
+        recorder = SessionRecorder(args.record)
+    if args.shm:
+        shm = PositionPublisher(block_name(args.port))
+        state["shm"] = shm.name   # tells GUIs on this machine to attach
+        shm.write(state["position"])
     print("=" * 45)
     print("  Braill'ie Position Server")
-    print("  WebSocket running on ws://localhost:8765")
+    print(f"  WebSocket running on ws://{args.host}:{args.port}")
+    if args.record:
+        print(f"  Recording to {args.record}")
+    if args.shm:
+        print(f"  Shared-memory positions in '{shm.name}'")
     print("  Waiting for GUI to connect...")
     print("=" * 45)
-    async with websockets.serve(handler, "localhost", 8765):
-        await asyncio.Future()  # run forever
+    # Stop cleanly on SIGTERM too, so the session log is closed
+    stop = asyncio.get_running_loop().create_future()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.cancel)
+    except (NotImplementedError, AttributeError):
+        pass  # Windows: Ctrl+C only
+    try:
+        async with websockets.serve(handler, args.host, args.port):
+            if args.replay:
+                await replay(args.replay, args.speed)
+            await stop  # run forever
+    finally:
+        if recorder:
+            recorder.close()
+            print(f"[SERVER] Recorded {recorder.count} events to {args.record}")
+        if shm:
+            shm.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    ap = argparse.ArgumentParser(description="Braill'ie position server")
+    ap.add_argument("--host", default="localhost")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--record", metavar="PATH",
+                    help="append every incoming frame and outgoing event to a session log")
+    ap.add_argument("--replay", metavar="PATH",
+                    help="feed a recorded session back through the server")
+    ap.add_argument("--speed", type=float, default=1.0,
+                    help="replay speed multiplier (0 = as fast as possible)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="worker processes sharing the port (needs SO_REUSEPORT)")
+    ap.add_argument("--shm", action="store_true",
+                    help="also publish positions in shared memory for a GUI on this machine")
+    args = ap.parse_args()
+    if args.workers > 1:
+        if not hasattr(socket, "SO_REUSEPORT"):
+            ap.error("--workers needs SO_REUSEPORT (Linux / macOS)")
+        if args.record or args.replay or args.shm:
+            ap.error("--record / --replay / --shm only work with a single worker")
+    try:
+        asyncio.run(run_hub(args) if args.workers > 1 else main(args))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
@@ -0,0 +1,74 @@
+# Braill'ie — Position Stabilizer
+# Turns the raw, continuous glove position into a steady character index.
+#
+#   hysteresis  the value must move this far (in characters) past a
+#               boundary before the index changes, so a glove resting on
+#               a boundary no longer flips between two characters
+#   min_dwell   a new index must hold this long (s) before it is published
+#   max_rate    at most this many published changes per second
+#   dedup       an index equal to the last published one is never re-sent
+#
+# Pure Python with no imports, so the same file runs on the Pico
+# (sensor_fusion.py) and in position_server.py. Times are passed in by
+# the caller in seconds.
+
+class PositionStabilizer:
+    def __init__(self, hysteresis=0.3, min_dwell=0.03, max_rate=30.0):
+        self.hysteresis = hysteresis
+        self.min_dwell  = min_dwell
+        self.min_gap    = 1.0 / max_rate if max_rate else 0.0
+        self.reset()
+
+    def reset(self, position=None):
+        self.position  = position   # last published index
+        self.held      = position   # index after hysteresis
+        self.candidate = None       # index waiting to be published
+        self.since     = 0.0        # when the candidate appeared
+        self.last_emit = -1e9
+
+    def quantize(self, value):
+        # Stay on the held index while the value is inside its
+        # cell widened by the hysteresis band on both sides
+        h = self.held
+        if h is not None and h - self.hysteresis <= value < h + 1 + self.hysteresis:
+            return h
+        h = int(value // 1)
+        if h < 0:
+            h = 0
+        self.held = h
+        return h
+
+    def update(self, value, now):
+        """Feed a raw position. Returns the index to publish, or None."""
+        return self._settle(self.quantize(value), now)
+
+    def poll(self, now):
+        """Re-check a candidate held back by min_dwell / max_rate.
+        Returns the index to publish, or None."""
+        if self.candidate is None:
+            return None
+        return self._settle(self.candidate, now)
+
+    def wait(self, now):
+        """Seconds until poll() can publish the pending candidate,
+        or None if nothing is pending."""
+        if self.candidate is None:
+            return None
+        ready = max(self.since + self.min_dwell, self.last_emit + self.min_gap)
+        return max(0.0, ready - now)
+
+    def _settle(self, index, now):
+        if index == self.position:
+            self.candidate = None
+            return None
+        if index != self.candidate:
+            self.candidate = index
+            self.since = now
+        if now - self.since < self.min_dwell:
+            return None
+        if now - self.last_emit < self.min_gap:
+            return None
+        self.position  = index
+        self.candidate = None
+        self.last_emit = now
+        return index
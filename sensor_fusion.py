@@ -1,6 +1,7 @@
 # Braill'ie — Sensor Fusion
 # MPU6050 (Accel + Gyro) + GY-271 (Magnetometer)
-# Complementary Filter → gives stable, repeatable position
+# Complementary or quaternion (Madgwick / Mahony) filter
+# → gives stable, repeatable position
 #
 # When you move to a position → get a consistent value
 # When you return to same position → get same value again
@@ -11,6 +12,8 @@ from machine import I2C, Pin
 import time
 import math
 
+from position_stabilizer import PositionStabilizer   # upload this file too
+
 # ─────────────────────────────────────────
 # I2C SETUP
 # ─────────────────────────────────────────
@@ -67,17 +70,38 @@ def read_qmc():
     mz = read_qmc_raw(0x04)
     return mx, my, mz
 
+# ─────────────────────────────────────────
+# FILTER CHOICE
+# "complementary" — Euler angles, cheapest
+# "madgwick"      — quaternion, gradient descent
+# "mahony"        — quaternion, PI feedback
+# All three fuse gx/gy/gz and give a
+# tilt-compensated heading.
+# ─────────────────────────────────────────
+FILTER    = "madgwick"
+LOOP_HZ   = 200
+dt        = 1 / LOOP_HZ   # nominal; the loop measures the real dt
+BENCHMARK = True          # print each filter's cost at start-up
+
+DEG = 180 / math.pi
+RAD = math.pi / 180
+
+# Fused angles (seeded from the first reading by seed_filters)
+pitch   = 0.0
+roll    = 0.0
+heading = 0.0
+
+def wrap180(a):
+    if a > 180:  a -= 360
+    if a < -180: a += 360
+    return a
+
 # ─────────────────────────────────────────
 # COMPLEMENTARY FILTER
 # Blends accelerometer + gyroscope
 # Alpha = how much we trust gyroscope (0.95 = 95%)
 # ─────────────────────────────────────────
 ALPHA = 0.95   # trust gyro more for fast movements
-dt    = 0.05   # 50ms loop = 20Hz
-
-# Fused angles (start at 0)
-pitch = 0.0
-roll  = 0.0
 
 def complementary_filter(ax, ay, az, gx, gy, pitch, roll, dt):
     # Angle from accelerometer
@@ -90,6 +114,13 @@ def complementary_filter(ax, ay, az, gx, gy, pitch, roll, dt):
 
     return pitch, roll
 
+def complementary_heading(heading, mag_heading, gz, dt):
+    # Gyro z predicts the turn, compass corrects drift
+    # (turning +gz rotates the field the other way in the sensor frame)
+    pred = heading - gz * dt
+    heading = pred + (1 - ALPHA) * wrap180(mag_heading - pred)
+    return heading % 360
+
 # ─────────────────────────────────────────
 # HEADING FROM MAGNETOMETER
 # Gives compass direction (0-360°)
@@ -100,6 +131,248 @@ def get_heading(mx, my):
         heading += 360
     return heading
 
+def get_tilt_heading(mx, my, mz, pitch, roll):
+    # Rotate the field back to horizontal before atan2, so tilting the
+    # hand doesn't swing the heading. `pitch` is about x, `roll` about y.
+    # Assumes the GY-271 is mounted with its axes aligned to the MPU6050.
+    sp, cp = math.sin(pitch * RAD), math.cos(pitch * RAD)
+    sr, cr = math.sin(roll * RAD),  math.cos(roll * RAD)
+    bx = mx * cr + my * sp * sr + mz * cp * sr
+    by = my * cp - mz * sp
+    return math.atan2(by, bx) * DEG % 360
+
+# ─────────────────────────────────────────
+# QUATERNION FILTERS
+# State lives in preallocated float arrays
+# and is updated in place: no lists, tuples
+# or objects per update (the only heap use is
+# MicroPython's boxed float temporaries).
+# ─────────────────────────────────────────
+from array import array
+
+BETA   = 0.1    # Madgwick gain
+TWO_KP = 1.0    # Mahony proportional gain (×2)
+TWO_KI = 0.0    # Mahony integral gain (×2), >0 learns gyro bias
+
+q    = array('f', (1.0, 0.0, 0.0, 0.0))   # w, x, y, z
+eint = array('f', (0.0, 0.0, 0.0))        # Mahony integral error
+
+def reset_quaternion():
+    q[0] = 1.0; q[1] = 0.0; q[2] = 0.0; q[3] = 0.0
+    eint[0] = 0.0; eint[1] = 0.0; eint[2] = 0.0
+
+def madgwick_update(ax, ay, az, gx, gy, gz, mx, my, mz, dt):
+    # Madgwick MARG filter; gyro in rad/s
+    q0 = q[0]; q1 = q[1]; q2 = q[2]; q3 = q[3]
+
+    # Rate of change of quaternion from gyroscope
+    qd0 = 0.5 * (-q1 * gx - q2 * gy - q3 * gz)
+    qd1 = 0.5 * ( q0 * gx + q2 * gz - q3 * gy)
+    qd2 = 0.5 * ( q0 * gy - q1 * gz + q3 * gx)
+    qd3 = 0.5 * ( q0 * gz + q1 * gy - q2 * gx)
+
+    n = ax * ax + ay * ay + az * az
+    m = mx * mx + my * my + mz * mz
+    if n > 0.0 and m > 0.0:
+        n = 1.0 / math.sqrt(n); ax *= n; ay *= n; az *= n
+        m = 1.0 / math.sqrt(m); mx *= m; my *= m; mz *= m
+
+        _2q0mx = 2.0 * q0 * mx; _2q0my = 2.0 * q0 * my; _2q0mz = 2.0 * q0 * mz
+        _2q1mx = 2.0 * q1 * mx
+        _2q0 = 2.0 * q0; _2q1 = 2.0 * q1; _2q2 = 2.0 * q2; _2q3 = 2.0 * q3
+        _2q0q2 = 2.0 * q0 * q2; _2q2q3 = 2.0 * q2 * q3
+        q0q0 = q0 * q0; q0q1 = q0 * q1; q0q2 = q0 * q2; q0q3 = q0 * q3
+        q1q1 = q1 * q1; q1q2 = q1 * q2; q1q3 = q1 * q3
+        q2q2 = q2 * q2; q2q3 = q2 * q3; q3q3 = q3 * q3
+
+        # Reference direction of Earth's magnetic field
+        hx = (mx * q0q0 - _2q0my * q3 + _2q0mz * q2 + mx * q1q1 + _2q1 * my * q2
+              + _2q1 * mz * q3 - mx * q2q2 - mx * q3q3)
+        hy = (_2q0mx * q3 + my * q0q0 - _2q0mz * q1 + _2q1mx * q2 - my * q1q1
+              + my * q2q2 + _2q2 * mz * q3 - my * q3q3)
+        _2bx = math.sqrt(hx * hx + hy * hy)
+        _2bz = (-_2q0mx * q2 + _2q0my * q1 + mz * q0q0 + _2q1mx * q3 - mz * q1q1
+                + _2q2 * my * q3 - mz * q2q2 + mz * q3q3)
+        _4bx = 2.0 * _2bx; _4bz = 2.0 * _2bz
+
+        # Gradient descent corrective step
+        f1 = 2.0 * q1q3 - _2q0q2 - ax
+        f2 = 2.0 * q0q1 + _2q2q3 - ay
+        f3 = 1.0 - 2.0 * q1q1 - 2.0 * q2q2 - az
+        f4 = _2bx * (0.5 - q2q2 - q3q3) + _2bz * (q1q3 - q0q2) - mx
+        f5 = _2bx * (q1q2 - q0q3) + _2bz * (q0q1 + q2q3) - my
+        f6 = _2bx * (q0q2 + q1q3) + _2bz * (0.5 - q1q1 - q2q2) - mz
+        s0 = -_2q2 * f1 + _2q1 * f2 - _2bz * q2 * f4 + (-_2bx * q3 + _2bz * q1) * f5 + _2bx * q2 * f6
+        s1 = (_2q3 * f1 + _2q0 * f2 - 2.0 * _2q1 * f3
+              + _2bz * q3 * f4 + (_2bx * q2 + _2bz * q0) * f5 + (_2bx * q3 - _4bz * q1) * f6)
+        s2 = (-_2q0 * f1 + _2q3 * f2 - 2.0 * _2q2 * f3 + (-_4bx * q2 - _2bz * q0) * f4
+              + (_2bx * q1 + _2bz * q3) * f5 + (_2bx * q0 - _4bz * q2) * f6)
+        s3 = _2q1 * f1 + _2q2 * f2 + (-_4bx * q3 + _2bz * q1) * f4 + (-_2bx * q0 + _2bz * q2) * f5 + _2bx * q1 * f6
+        n = s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3
+        if n > 0.0:
+            n = BETA / math.sqrt(n)
+            qd0 -= n * s0; qd1 -= n * s1; qd2 -= n * s2; qd3 -= n * s3
+
+    q0 += qd0 * dt; q1 += qd1 * dt; q2 += qd2 * dt; q3 += qd3 * dt
+    n = 1.0 / math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+    q[0] = q0 * n; q[1] = q1 * n; q[2] = q2 * n; q[3] = q3 * n
+
+def mahony_update(ax, ay, az, gx, gy, gz, mx, my, mz, dt):
+    # Mahony MARG filter; gyro in rad/s
+    q0 = q[0]; q1 = q[1]; q2 = q[2]; q3 = q[3]
+
+    n = ax * ax + ay * ay + az * az
+    m = mx * mx + my * my + mz * mz
+    if n > 0.0 and m > 0.0:
+        n = 1.0 / math.sqrt(n); ax *= n; ay *= n; az *= n
+        m = 1.0 / math.sqrt(m); mx *= m; my *= m; mz *= m
+
+        q0q0 = q0 * q0; q0q1 = q0 * q1; q0q2 = q0 * q2; q0q3 = q0 * q3
+        q1q1 = q1 * q1; q1q2 = q1 * q2; q1q3 = q1 * q3
+        q2q2 = q2 * q2; q2q3 = q2 * q3; q3q3 = q3 * q3
+
+        # Reference direction of Earth's magnetic field
+        hx = 2.0 * (mx * (0.5 - q2q2 - q3q3) + my * (q1q2 - q0q3) + mz * (q1q3 + q0q2))
+        hy = 2.0 * (mx * (q1q2 + q0q3) + my * (0.5 - q1q1 - q3q3) + mz * (q2q3 - q0q1))
+        bx = math.sqrt(hx * hx + hy * hy)
+        bz = 2.0 * (mx * (q1q3 - q0q2) + my * (q2q3 + q0q1) + mz * (0.5 - q1q1 - q2q2))
+
+        # Estimated gravity and field directions
+        vx = q1q3 - q0q2
+        vy = q0q1 + q2q3
+        vz = q0q0 - 0.5 + q3q3
+        wx = bx * (0.5 - q2q2 - q3q3) + bz * (q1q3 - q0q2)
+        wy = bx * (q1q2 - q0q3) + bz * (q0q1 + q2q3)
+        wz = bx * (q0q2 + q1q3) + bz * (0.5 - q1q1 - q2q2)
+
+        # Error = cross product of measured and estimated directions
+        ex = (ay * vz - az * vy) + (my * wz - mz * wy)
+        ey = (az * vx - ax * vz) + (mz * wx - mx * wz)
+        ez = (ax * vy - ay * vx) + (mx * wy - my * wx)
+
+        if TWO_KI > 0.0:
+            eint[0] += TWO_KI * ex * dt
+            eint[1] += TWO_KI * ey * dt
+            eint[2] += TWO_KI * ez * dt
+            gx += eint[0]; gy += eint[1]; gz += eint[2]
+
+        gx += TWO_KP * ex; gy += TWO_KP * ey; gz += TWO_KP * ez
+
+    gx *= 0.5 * dt; gy *= 0.5 * dt; gz *= 0.5 * dt
+    qa = q0; qb = q1; qc = q2
+    q0 += -qb * gx - qc * gy - q3 * gz
+    q1 += qa * gx + qc * gz - q3 * gy
+    q2 += qa * gy - qb * gz + q3 * gx
+    q3 += qa * gz + qb * gy - qc * gx
+    n = 1.0 / math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+    q[0] = q0 * n; q[1] = q1 * n; q[2] = q2 * n; q[3] = q3 * n
+
+def quaternion_angles():
+    # Same conventions as the complementary filter:
+    # pitch = about x, roll = about y, heading like get_heading()
+    q0 = q[0]; q1 = q[1]; q2 = q[2]; q3 = q[3]
+    p = math.atan2(2.0 * (q0 * q1 + q2 * q3), 1.0 - 2.0 * (q1 * q1 + q2 * q2)) * DEG
+    s = 2.0 * (q0 * q2 - q3 * q1)
+    if s > 1.0:  s = 1.0
+    if s < -1.0: s = -1.0
+    r = math.asin(s) * DEG
+    h = -math.atan2(2.0 * (q0 * q3 + q1 * q2), 1.0 - 2.0 * (q2 * q2 + q3 * q3)) * DEG
+    return p, r, h % 360
+
+# ─────────────────────────────────────────
+# FUSE ONE SAMPLE
+# Runs the selected filter and returns
+# (pitch, roll, heading) in degrees
+# ─────────────────────────────────────────
+def fuse(kind, ax, ay, az, gx, gy, gz, mx, my, mz, dt):
+    global pitch, roll, heading
+    if kind == "complementary":
+        pitch, roll = complementary_filter(ax, ay, az, gx, gy, pitch, roll, dt)
+        heading = complementary_heading(
+            heading, get_tilt_heading(mx, my, mz, pitch, roll), gz, dt)
+    else:
+        update = madgwick_update if kind == "madgwick" else mahony_update
+        update(ax, ay, az, gx * RAD, gy * RAD, gz * RAD, mx, my, mz, dt)
+        pitch, roll, heading = quaternion_angles()
+    return pitch, roll, heading
+
+# ─────────────────────────────────────────
+# SEED THE FILTERS
+# Start from the orientation one accel + mag
+# reading gives, instead of from zero / the
+# identity quaternion, so calibrating on the
+# first sample doesn't lock in an origin the
+# filter is still converging away from
+# ─────────────────────────────────────────
+def seed_filters(ax, ay, az, mx, my, mz):
+    global pitch, roll, heading
+
+    # Complementary: its resting point is exactly accel angles + tilt heading
+    pitch = math.atan2(ay, math.sqrt(ax*ax + az*az)) * DEG
+    roll  = math.atan2(-ax, az) * DEG
+    heading = get_tilt_heading(mx, my, mz, pitch, roll)
+
+    # Quaternion: earth axes seen from the sensor (z = gravity,
+    # x = horizontal field, y = z × x) are the rows of its rotation matrix
+    n = math.sqrt(ax*ax + ay*ay + az*az)
+    if n == 0.0:
+        reset_quaternion()
+        return
+    zx = ax / n; zy = ay / n; zz = az / n
+    d = mx * zx + my * zy + mz * zz
+    xx = mx - d * zx; xy = my - d * zy; xz = mz - d * zz
+    n = math.sqrt(xx*xx + xy*xy + xz*xz)
+    if n == 0.0:
+        reset_quaternion()
+        return
+    xx /= n; xy /= n; xz /= n
+    yx = zy * xz - zz * xy; yy = zz * xx - zx * xz; yz = zx * xy - zy * xx
+
+    # Rotation matrix → quaternion, on the largest diagonal term for accuracy
+    t = xx + yy + zz
+    if t > 0.0:
+        s = 2.0 * math.sqrt(1.0 + t)
+        q0 = 0.25 * s; q1 = (zy - yz) / s; q2 = (xz - zx) / s; q3 = (yx - xy) / s
+    elif xx > yy and xx > zz:
+        s = 2.0 * math.sqrt(1.0 + xx - yy - zz)
+        q0 = (zy - yz) / s; q1 = 0.25 * s; q2 = (xy + yx) / s; q3 = (xz + zx) / s
+    elif yy > zz:
+        s = 2.0 * math.sqrt(1.0 + yy - xx - zz)
+        q0 = (xz - zx) / s; q1 = (xy + yx) / s; q2 = 0.25 * s; q3 = (yz + zy) / s
+    else:
+        s = 2.0 * math.sqrt(1.0 + zz - xx - yy)
+        q0 = (yx - xy) / s; q1 = (xz + zx) / s; q2 = (yz + zy) / s; q3 = 0.25 * s
+    q[0] = q0; q[1] = q1; q[2] = q2; q[3] = q3
+    eint[0] = 0.0; eint[1] = 0.0; eint[2] = 0.0
+    if FILTER != "complementary":
+        pitch, roll, heading = quaternion_angles()
+
+# ─────────────────────────────────────────
+# FILTER BENCHMARK
+# Times each filter on a live sample and
+# reports µs per update, heap use and the
+# best loop rate it allows with sensor reads
+# ─────────────────────────────────────────
+def benchmark_filters(n=200):
+    import gc
+    t0 = time.ticks_us()
+    for _ in range(20):
+        sample = read_mpu() + read_qmc()
+    read_us = time.ticks_diff(time.ticks_us(), t0) / 20
+    print(f"sensor read: {read_us:7.0f} µs")
+    for kind in ("complementary", "madgwick", "mahony"):
+        gc.collect()
+        before = gc.mem_alloc() if hasattr(gc, "mem_alloc") else 0
+        t0 = time.ticks_us()
+        for _ in range(n):
+            fuse(kind, *sample, dt)
+        us = time.ticks_diff(time.ticks_us(), t0) / n
+        heap = ((gc.mem_alloc() if hasattr(gc, "mem_alloc") else 0) - before) / n
+        hz = 1e6 / (us + read_us)
+        print(f"{kind:>13}: {us:7.0f} µs/update  {heap:6.0f} B/update  max {hz:5.0f} Hz")
+    # The runs above left every filter somewhere arbitrary: start over
+    seed_filters(sample[0], sample[1], sample[2], sample[6], sample[7], sample[8])
+
 # ─────────────────────────────────────────
 # POSITION MAPPING
 # Converts fused sensor values → position index
@@ -116,12 +389,14 @@ def calibrate(pitch, roll, heading):
     ref_pitch   = pitch
     ref_roll    = roll
     ref_heading = heading
+    stabilizer.reset(0)
     print(f"✔ Calibrated! Origin set.")
     print(f"  ref_pitch={pitch:.1f}  ref_roll={roll:.1f}  ref_heading={heading:.1f}")
 
-def get_position_index(pitch, roll, heading):
+def get_position_value(pitch, roll, heading):
+    # Continuous position in characters (before rounding)
     if ref_pitch is None:
-        return 0  # not calibrated yet
+        return 0.0  # not calibrated yet
 
     # Delta from origin
     d_pitch   = pitch   - ref_pitch
@@ -136,11 +411,15 @@ def get_position_index(pitch, roll, heading):
     # Adjust SCALE to match your physical page size
     # Higher scale = more movement needed per character
     SCALE = 5.0
-    position = int((d_pitch + d_roll * 0.5 + d_heading * 0.3) / SCALE)
+    return (d_pitch + d_roll * 0.5 + d_heading * 0.3) / SCALE
 
+def get_position_index(pitch, roll, heading):
     # Clamp to positive values only
-    position = max(0, position)
-    return position
+    return max(0, int(get_position_value(pitch, roll, heading)))
+
+# Hysteresis / dwell / rate limit so a glove resting
+# on a boundary doesn't flip between two characters
+stabilizer = PositionStabilizer(hysteresis=0.3, min_dwell=0.1, max_rate=10.0)
 
 # ─────────────────────────────────────────
 # MAIN LOOP
@@ -155,28 +434,43 @@ print("Press CTRL+C then type: calibrate() to set origin\n")
 print("Auto-calibrating in 2 seconds... hold glove at top-left of page!")
 time.sleep(2)
 
+if BENCHMARK:
+    benchmark_filters()
+print(f"Filter: {FILTER} @ {LOOP_HZ} Hz")
+
+ax, ay, az, gx, gy, gz = read_mpu()
+mx, my, mz             = read_qmc()
+seed_filters(ax, ay, az, mx, my, mz)
+
 loop_count = 0
+last = time.ticks_us()
 
 while True:
+    # Real time since last sample
+    now = time.ticks_us()
+    step = time.ticks_diff(now, last) / 1e6 if loop_count else dt
+    last = now
+
     # Read sensors
     ax, ay, az, gx, gy, gz = read_mpu()
     mx, my, mz             = read_qmc()
 
-    # Fuse accel + gyro
-    pitch, roll = complementary_filter(ax, ay, az, gx, gy, pitch, roll, dt)
-
-    # Get heading from compass
-    heading = get_heading(mx, my)
+    # Fuse accel + gyro + compass
+    pitch, roll, heading = fuse(FILTER, ax, ay, az, gx, gy, gz, mx, my, mz, step)
 
     # Auto calibrate on first reading
     if loop_count == 0:
         calibrate(pitch, roll, heading)
 
-    # Get position index
-    pos = get_position_index(pitch, roll, heading)
+    # Get stable position index (None = unchanged)
+    value = get_position_value(pitch, roll, heading)
+    pos = stabilizer.update(value, time.ticks_ms() / 1000)
 
-    # Print every reading
-    print(f"pitch={pitch:6.1f}°  roll={roll:6.1f}°  heading={heading:6.1f}°  → position={pos}")
+    # Print only when the position changes
+    if pos is not None:
+        print(f"pitch={pitch:6.1f}°  roll={roll:6.1f}°  heading={heading:6.1f}°  → position={pos}")
 
     loop_count += 1
-    time.sleep(dt)
+    spare = int(dt * 1e6) - time.ticks_diff(time.ticks_us(), now)
+    if spare > 0:
+        time.sleep_us(spare)
@@ -0,0 +1,136 @@
+"""
+Braill'ie - Session Log
+========================
+Compact append-only binary log of a reading session: every command the
+server receives (including raw glove "sensor" frames) and every message
+it broadcasts, each stamped with a monotonic clock.
+
+File layout:
+    header   b"BRLOG" + version byte + f64 wall-clock start time
+    record   u32 µs since previous record, u8 kind, body
+
+    kind 1   sensor frame in    f32 value             (5 bytes + header)
+    kind 2   position out       u32 position          (5 bytes + header)
+    kind 3   other command in   u32 length + JSON
+    kind 4   other message out  u32 length + JSON
+    kind 5   session start      f64 wall-clock start time; begins each
+                                later recording appended to the file
+    kind 0   gap                no body (clock jumped > 71 min)
+
+Used by position_server.py --record / --replay. Can also dump a log:
+    python session_log.py session.brl
+"""
+
+import json
+import struct
+import sys
+import time
+
+MAGIC   = b"BRLOG\x01"
+HEADER  = struct.Struct("<d")
+RECORD  = struct.Struct("<IB")
+F32     = struct.Struct("<f")
+U32     = struct.Struct("<I")
+
+GAP, SENSOR_IN, POSITION_OUT, CMD_IN, MSG_OUT, SESSION = range(6)
+MAX_DELTA = 0xFFFFFFFF
+
+# ─────────────────────────────────────────
+# WRITER
+# ─────────────────────────────────────────
+class SessionRecorder:
+    def __init__(self, path):
+        self.f = open(path, "ab")
+        self.last = time.monotonic_ns() // 1000
+        self.last_flush = time.monotonic()
+        self.count = 0
+        if self.f.tell() == 0:
+            self.f.write(MAGIC + HEADER.pack(time.time()))
+        else:
+            # Appending: mark where this recording starts, its clock is new
+            self.f.write(RECORD.pack(0, SESSION) + HEADER.pack(time.time()))
+
+    def close(self):
+        self.f.close()
+
+    def record_in(self, data):
+        if data.get("cmd") == "sensor":
+            self._write(SENSOR_IN, F32.pack(float(data.get("value", 0.0))))
+        else:
+            self._write(CMD_IN, _json(data))
+
+    def record_out(self, message):
+        pos = message.get("position")
+        if (message.get("type") == "position" and len(message) == 2
+                and isinstance(pos, int) and 0 <= pos <= 0xFFFFFFFF):
+            self._write(POSITION_OUT, U32.pack(pos))
+        else:
+            self._write(MSG_OUT, _json(message))
+
+    def _write(self, kind, body):
+        now = time.monotonic_ns() // 1000
+        delta = now - self.last
+        self.last = now
+        while delta > MAX_DELTA:
+            self.f.write(RECORD.pack(MAX_DELTA, GAP))
+            delta -= MAX_DELTA
+        self.f.write(RECORD.pack(delta, kind) + body)
+        self.count += 1
+        # Flush about once a second so a crash loses little
+        if time.monotonic() - self.last_flush > 1.0:
+            self.f.flush()
+            self.last_flush = time.monotonic()
+
+def _json(obj):
+    raw = json.dumps(obj, separators=(",", ":")).encode()
+    return U32.pack(len(raw)) + raw
+
+# ─────────────────────────────────────────
+# READER
+# Yields (seconds since start, "in"/"out", message dict),
+# and (0.0, "session", {"started": wall time}) where a
+# later recording begins (its times start again at 0)
+# ─────────────────────────────────────────
+def read_session(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path}: not a Braill'ie session log")
+    i = len(MAGIC) + HEADER.size
+    t = 0
+    while i + RECORD.size <= len(data):
+        delta, kind = RECORD.unpack_from(data, i)
+        i += RECORD.size
+        t += delta
+        if kind == GAP:
+            continue
+        if kind == SESSION:
+            if i + HEADER.size > len(data): break
+            t = 0
+            yield 0.0, "session", {"started": HEADER.unpack_from(data, i)[0]}
+            i += HEADER.size
+            continue
+        if kind == SENSOR_IN:
+            if i + F32.size > len(data): break
+            yield t / 1e6, "in", {"cmd": "sensor", "value": F32.unpack_from(data, i)[0]}
+            i += F32.size
+        elif kind == POSITION_OUT:
+            if i + U32.size > len(data): break
+            yield t / 1e6, "out", {"type": "position", "position": U32.unpack_from(data, i)[0]}
+            i += U32.size
+        elif kind in (CMD_IN, MSG_OUT):
+            if i + U32.size > len(data): break
+            n = U32.unpack_from(data, i)[0]
+            i += U32.size
+            if i + n > len(data): break   # truncated tail after a crash
+            yield t / 1e6, "in" if kind == CMD_IN else "out", json.loads(data[i:i + n])
+            i += n
+        else:
+            raise ValueError(f"{path}: unknown record kind {kind} at byte {i}")
+
+if __name__ == "__main__":
+    n = 0
+    for t, direction, msg in read_session(sys.argv[1]):
+        print(f"{t:10.4f}  {direction:>3}  {json.dumps(msg)}")
+        n += 1
+    print(f"{n} record(s)")
@@ -0,0 +1,100 @@
+"""
+Braill'ie - Shared-Memory Position
+===================================
+Same-host fast path from position_server.py to the GUI. The server
+writes the current position, its cell bits, an end-of-text flag and a
+sequence number into a small `multiprocessing.shared_memory` block; the
+GUI polls it once per frame instead of waiting for WebSocket + JSON + loopback TCP.
+
+Block layout (little-endian, 24 bytes):
+    u64  seq        odd while the server is writing (seqlock)
+    i64  position
+    u8   cell bits  dots of the character at `position`
+    u8   flags      bit 0 = reached end of text
+                    bit 1 = cell bits valid (server has the text)
+    6 bytes padding
+
+Only one writer (the server) is allowed; any number of readers.
+"""
+
+import struct
+import sys
+from multiprocessing import shared_memory
+
+SEQ     = struct.Struct("<Q")
+PAYLOAD = struct.Struct("<qBB")
+SIZE    = 24
+FLAG_DONE = 0x01
+FLAG_CELL = 0x02
+
+def block_name(port):
+    return f"braillie_pos_{port}"
+
+# ─────────────────────────────────────────
+# WRITER (server)
+# ─────────────────────────────────────────
+class PositionPublisher:
+    def __init__(self, name):
+        try:
+            self.shm = shared_memory.SharedMemory(name, create=True, size=SIZE)
+        except FileExistsError:
+            # Left over from a crashed server: take it over
+            self.shm = shared_memory.SharedMemory(name)
+        self.name = name
+        self.buf  = self.shm.buf
+        self.seq  = 0
+        SEQ.pack_into(self.buf, 0, 0)
+
+    def write(self, position, bits=0, flags=0):
+        # Pack first: if the values don't fit, raise before seq goes odd
+        payload = PAYLOAD.pack(position, bits, flags)
+        self.seq += 1                       # odd: write in progress
+        SEQ.pack_into(self.buf, 0, self.seq)
+        self.buf[SEQ.size:SEQ.size + PAYLOAD.size] = payload
+        self.seq += 1                       # even: consistent
+        SEQ.pack_into(self.buf, 0, self.seq)
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        self.shm.unlink()
+
+# ─────────────────────────────────────────
+# READER (GUI)
+# ─────────────────────────────────────────
+class PositionReader:
+    def __init__(self, name):
+        self.shm  = _attach(name)
+        self.buf  = self.shm.buf
+        self.last = 0
+
+    def read(self):
+        """(position, bits, flags) if it changed since the last call,
+        else None."""
+        for _ in range(8):
+            s1 = SEQ.unpack_from(self.buf, 0)[0]
+            if s1 == self.last:
+                return None
+            if s1 & 1:
+                continue                    # writer busy: retry
+            data = PAYLOAD.unpack_from(self.buf, SEQ.size)
+            if SEQ.unpack_from(self.buf, 0)[0] == s1:
+                self.last = s1
+                return data
+        return None                         # still busy; try next frame
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+def _attach(name):
+    # Readers must not unlink the server's block when they exit
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    shm = shared_memory.SharedMemory(name)
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
@@ -0,0 +1,403 @@
+# Braill'ie — `machine` simulator for CPython
+# Stand-in for MicroPython's `machine` module so the unmodified Pico
+# scripts run, get tested and get profiled on a laptop:
+#
+#   I2C    bus with an emulated MPU6050 (0x68) and QMC5883L (0x0D)
+#   Pin    GPIO with a readable level
+#   Timer  periodic / one-shot callbacks on a thread
+#
+# The sensors follow a slow synthetic hand movement (or a recorded
+# trace), with noise and gyro bias, through their real register maps.
+# Use sim/run.py to launch a script; it sets these knobs:
+#
+#   BRAILLIE_SIM_TRACE      CSV trace: t,ax,ay,az,gx,gy,gz,mx,my,mz
+#                           (s, g, deg/s, gauss); loops at the end
+#   BRAILLIE_SIM_SEED       noise seed (default 1)
+#   BRAILLIE_SIM_NOISE      noise scale, 0 = ideal sensors (default 1)
+#   BRAILLIE_SIM_GYRO_BIAS  "x,y,z" in deg/s (default 0.5,-0.3,0.2)
+#   BRAILLIE_SIM_FAST       1 = sleeps advance a virtual clock instead
+#                           of blocking, to measure raw loop throughput
+
+import math
+import os
+import random
+import struct
+import threading
+import time
+
+# ─────────────────────────────────────────
+# CLOCK
+# Real time, plus everything "slept" when
+# running in fast mode
+# ─────────────────────────────────────────
+FAST = os.environ.get("BRAILLIE_SIM_FAST") == "1"
+
+_t0      = time.perf_counter()
+_slept   = 0.0
+_deadline = None   # sim time at which run.py stops the script
+_real_sleep = time.sleep
+
+class SimulationEnd(Exception):
+    pass
+
+def now():
+    return time.perf_counter() - _t0 + _slept
+
+def set_deadline(seconds):
+    global _deadline
+    _deadline = seconds
+
+def _check_deadline():
+    if _deadline is not None and now() >= _deadline:
+        raise SimulationEnd()
+
+def _sleep(seconds):
+    global _slept
+    _check_deadline()
+    if seconds <= 0:
+        return
+    if _deadline is not None:
+        seconds = min(seconds, max(0.0, _deadline - now()))
+    if FAST:
+        _slept += seconds
+    else:
+        _real_sleep(seconds)
+    _check_deadline()
+
+# MicroPython's extra `time` functions, added to CPython's time module
+def _ticks_ms():
+    _check_deadline()
+    return int(now() * 1000) & 0x3FFFFFFF
+
+def _ticks_us():
+    _check_deadline()
+    return int(now() * 1000000) & 0x3FFFFFFF
+
+def _ticks_diff(a, b):
+    d = (a - b) & 0x3FFFFFFF
+    return d - 0x40000000 if d & 0x20000000 else d
+
+time.sleep       = _sleep
+time.sleep_ms    = lambda ms: _sleep(ms / 1000)
+time.sleep_us    = lambda us: _sleep(us / 1000000)
+time.ticks_ms    = _ticks_ms
+time.ticks_us    = _ticks_us
+time.ticks_cpu   = _ticks_us
+time.ticks_diff  = _ticks_diff
+time.ticks_add   = lambda t, d: (t + d) & 0x3FFFFFFF
+
+# ─────────────────────────────────────────
+# STATS (read by sim/run.py)
+# ─────────────────────────────────────────
+stats = {
+    "i2c_transactions": 0,
+    "i2c_bytes":        0,
+    "mpu_samples":      0,   # reads starting at ACCEL_XOUT_H
+    "qmc_samples":      0,   # reads starting at X LSB
+}
+
+# ─────────────────────────────────────────
+# MOTION
+# Orientation as ZYX Euler angles (rad) and
+# body rates (deg/s), either synthetic or
+# from a trace
+# ─────────────────────────────────────────
+GRAVITY = (0.0, 0.0, 1.0)        # g, pointing up out of a flat sensor
+FIELD   = (0.22, 0.0, -0.42)     # gauss, roughly mid-latitude
+
+def _synthetic(t):
+    # Slow sweeping hand: yaw across the page, a little pitch and roll
+    w1, w2, w3 = 2 * math.pi * 0.10, 2 * math.pi * 0.07, 2 * math.pi * 0.05
+    psi, dpsi = math.radians(25) * math.sin(w1 * t), math.radians(25) * w1 * math.cos(w1 * t)
+    th,  dth  = math.radians(10) * math.sin(w2 * t), math.radians(10) * w2 * math.cos(w2 * t)
+    phi, dphi = math.radians(6)  * math.sin(w3 * t), math.radians(6)  * w3 * math.cos(w3 * t)
+
+    # Euler rates → body rates
+    p = dphi - dpsi * math.sin(th)
+    q = dth * math.cos(phi) + dpsi * math.cos(th) * math.sin(phi)
+    r = -dth * math.sin(phi) + dpsi * math.cos(th) * math.cos(phi)
+
+    cf, sf = math.cos(phi), math.sin(phi)
+    ct, st = math.cos(th), math.sin(th)
+    cp, sp = math.cos(psi), math.sin(psi)
+    R = ((ct * cp, sf * st * cp - cf * sp, cf * st * cp + sf * sp),
+         (ct * sp, sf * st * sp + cf * cp, cf * st * sp - sf * cp),
+         (-st,     sf * ct,                cf * ct))
+
+    def body(v):
+        return tuple(R[0][i] * v[0] + R[1][i] * v[1] + R[2][i] * v[2] for i in range(3))
+
+    return body(GRAVITY), tuple(math.degrees(x) for x in (p, q, r)), body(FIELD)
+
+class Trace:
+    def __init__(self, path):
+        self.rows = []
+        with open(path) as f:
+            for line in f:
+                parts = line.replace(",", " ").split()
+                try:
+                    self.rows.append(tuple(float(x) for x in parts[:10]))
+                except ValueError:
+                    continue   # header or comment
+        if not self.rows:
+            raise ValueError(f"{path}: no samples")
+        self.length = self.rows[-1][0] - self.rows[0][0] or 1.0
+        self.i = 0
+
+    def sample(self, t):
+        t = self.rows[0][0] + t % self.length
+        if t < self.rows[self.i][0]:
+            self.i = 0
+        while self.i + 1 < len(self.rows) and self.rows[self.i + 1][0] <= t:
+            self.i += 1
+        r = self.rows[self.i]
+        return r[1:4], r[4:7], r[7:10]
+
+class World:
+    def __init__(self):
+        self.rng   = random.Random(int(os.environ.get("BRAILLIE_SIM_SEED", "1")))
+        self.noise = float(os.environ.get("BRAILLIE_SIM_NOISE", "1"))
+        bias = os.environ.get("BRAILLIE_SIM_GYRO_BIAS", "0.5,-0.3,0.2")
+        self.gyro_bias = tuple(float(x) for x in bias.split(","))
+        path = os.environ.get("BRAILLIE_SIM_TRACE")
+        self.trace = Trace(path) if path else None
+
+    def sample(self, t):
+        if self.trace:
+            accel, gyro, mag = self.trace.sample(t)
+        else:
+            accel, gyro, mag = _synthetic(t)
+        n, g = self.noise, self.rng.gauss
+        accel = tuple(a + g(0, 0.004 * n) for a in accel)
+        gyro  = tuple(w + b + g(0, 0.05 * n) for w, b in zip(gyro, self.gyro_bias))
+        mag   = tuple(m + g(0, 0.002 * n) for m in mag)
+        return accel, gyro, mag
+
+world = World()
+
+# ─────────────────────────────────────────
+# I2C DEVICES
+# Each keeps a 256-byte register file; data
+# registers are refreshed at the device's
+# output rate from the world model
+# ─────────────────────────────────────────
+def _clamp16(v):
+    return max(-32768, min(32767, int(round(v))))
+
+class MPU6050:
+    ADDR = 0x68
+
+    def __init__(self):
+        self.regs = bytearray(256)
+        self.regs[0x6B] = 0x40   # PWR_MGMT_1: asleep after power-up
+        self.regs[0x75] = 0x68   # WHO_AM_I
+        self.rate = 1000         # Hz, accel output rate
+        self.slot = -1
+
+    def write(self, reg, data):
+        for i, b in enumerate(data):
+            r = (reg + i) & 0xFF
+            if r == 0x6B and b & 0x80:
+                self.__init__()            # DEVICE_RESET
+            elif r != 0x75:
+                self.regs[r] = b
+
+    def read(self, reg, n):
+        if reg == 0x3B:
+            stats["mpu_samples"] += 1
+        self._refresh()
+        return bytes(self.regs[(reg + i) & 0xFF] for i in range(n))
+
+    def _refresh(self):
+        slot = int(now() * self.rate)
+        if slot == self.slot:
+            return
+        self.slot = slot
+        if self.regs[0x6B] & 0x40:
+            return                         # sleeping: registers hold zeros
+        accel, gyro, _ = world.sample(now())
+        a_lsb = 16384 >> ((self.regs[0x1C] >> 3) & 3)
+        g_lsb = 131.0 / (1 << ((self.regs[0x1B] >> 3) & 3))
+        temp  = (25.0 - 36.53) * 340
+        values = [a * a_lsb for a in accel] + [temp] + [w * g_lsb for w in gyro]
+        struct.pack_into(">7h", self.regs, 0x3B, *(_clamp16(v) for v in values))
+
+class QMC5883L:
+    ADDR = 0x0D
+    RATES = (10, 50, 100, 200)
+
+    def __init__(self):
+        self.regs = bytearray(256)
+        self.regs[0x0D] = 0xFF   # chip id
+        self.slot = -1
+
+    def write(self, reg, data):
+        for i, b in enumerate(data):
+            r = (reg + i) & 0xFF
+            if r == 0x0A and b & 0x80:
+                self.__init__()            # SOFT_RST
+            elif r != 0x0D:
+                self.regs[r] = b
+
+    def read(self, reg, n):
+        if reg == 0x00:
+            stats["qmc_samples"] += 1
+        self._refresh()
+        out = bytes(self.regs[(reg + i) & 0xFF] for i in range(n))
+        if reg < 0x06:
+            self.regs[0x06] &= ~0x01       # reading data clears DRDY
+        return out
+
+    def _refresh(self):
+        ctrl = self.regs[0x09]
+        if ctrl & 0x03 != 0x01:
+            return                         # standby
+        slot = int(now() * self.RATES[(ctrl >> 2) & 3])
+        if slot == self.slot:
+            return
+        self.slot = slot
+        _, _, mag = world.sample(now())
+        lsb = 3000 if (ctrl >> 4) & 3 else 12000   # 8G or 2G range
+        struct.pack_into("<3h", self.regs, 0x00, *(_clamp16(m * lsb) for m in mag))
+        self.regs[0x06] |= 0x01            # DRDY
+
+DEVICES = {MPU6050.ADDR: MPU6050(), QMC5883L.ADDR: QMC5883L()}
+
+# ─────────────────────────────────────────
+# I2C BUS
+# ─────────────────────────────────────────
+EIO = 5
+
+class I2C:
+    def __init__(self, id=0, *, scl=None, sda=None, freq=400000, timeout=50000):
+        self.id = id
+        self.freq = freq
+
+    def _device(self, addr):
+        stats["i2c_transactions"] += 1
+        dev = DEVICES.get(addr)
+        if dev is None:
+            raise OSError(EIO)             # MicroPython: [Errno 5] EIO (NACK)
+        return dev
+
+    def scan(self):
+        return sorted(DEVICES)
+
+    def readfrom_mem(self, addr, memaddr, nbytes, *, addrsize=8):
+        data = self._device(addr).read(memaddr, nbytes)
+        stats["i2c_bytes"] += nbytes
+        return data
+
+    def readfrom_mem_into(self, addr, memaddr, buf, *, addrsize=8):
+        buf[:] = self.readfrom_mem(addr, memaddr, len(buf))
+
+    def writeto_mem(self, addr, memaddr, buf, *, addrsize=8):
+        self._device(addr).write(memaddr, bytes(buf))
+        stats["i2c_bytes"] += len(buf)
+
+    def writeto(self, addr, buf, stop=True):
+        buf = bytes(buf)
+        if buf:
+            self.writeto_mem(addr, buf[0], buf[1:])
+        else:
+            self._device(addr)
+        return 1
+
+    def readfrom(self, addr, nbytes, stop=True):
+        return self.readfrom_mem(addr, 0x00, nbytes)
+
+SoftI2C = I2C
+
+# ─────────────────────────────────────────
+# GPIO
+# ─────────────────────────────────────────
+class Pin:
+    IN, OUT, OPEN_DRAIN = 0, 1, 2
+    PULL_UP, PULL_DOWN = 1, 2
+    IRQ_RISING, IRQ_FALLING = 4, 8
+
+    def __init__(self, id, mode=-1, pull=-1, *, value=None):
+        self.id = id
+        self.mode = mode
+        self.level = 1 if pull == Pin.PULL_UP else 0
+        if value is not None:
+            self.level = int(bool(value))
+
+    def value(self, v=None):
+        if v is None:
+            return self.level
+        self.level = int(bool(v))
+
+    def on(self):  self.level = 1
+    def off(self): self.level = 0
+    def toggle(self): self.level ^= 1
+    def irq(self, handler=None, trigger=0, hard=False): pass
+
+    __call__ = value
+
+    def __repr__(self):
+        return f"Pin({self.id})"
+
+# ─────────────────────────────────────────
+# IRQ + TIMER
+# "disabling IRQs" holds a lock that every
+# Timer callback also takes
+# ─────────────────────────────────────────
+_irq_lock = threading.RLock()
+
+def disable_irq():
+    _irq_lock.acquire()
+    return 1
+
+def enable_irq(state=1):
+    _irq_lock.release()
+
+class Timer:
+    ONE_SHOT, PERIODIC = 0, 1
+
+    def __init__(self, id=-1, **kwargs):
+        self._stop = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, *, mode=PERIODIC, freq=None, period=None, callback=None, hard=False):
+        self.deinit()
+        interval = 1.0 / freq if freq else (period or 1000) / 1000
+        stop = self._stop = threading.Event()
+
+        def run():
+            due = time.perf_counter()
+            while not stop.is_set():
+                due += interval
+                wait = due - time.perf_counter()
+                if wait > 0:
+                    stop.wait(wait)
+                if stop.is_set():
+                    break
+                if callback:
+                    with _irq_lock:
+                        callback(self)
+                if mode == Timer.ONE_SHOT:
+                    break
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def deinit(self):
+        if self._stop:
+            self._stop.set()
+            self._stop = None
+
+# ─────────────────────────────────────────
+# MISC
+# ─────────────────────────────────────────
+def freq(hz=None):
+    return 125000000
+
+def reset():
+    raise SystemExit("machine.reset()")
+
+def unique_id():
+    return b"\xb5\x1e\x00\x00\x00\x00\x00\x01"
+
+def idle():
+    pass
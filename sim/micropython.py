@@ -0,0 +1,22 @@
+# Braill'ie — `micropython` simulator for CPython
+# No-op versions of the MicroPython-only helpers the Pico scripts use.
+
+def const(x):
+    return x
+
+def native(f):
+    return f
+
+viper = native
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+def kbd_intr(ch):
+    pass
+
+def schedule(func, arg):
+    func(arg)
+
+def mem_info(verbose=False):
+    print("mem_info: not available in the simulator")
@@ -0,0 +1,92 @@
+"""
+Braill'ie - Pico Simulator Launcher
+====================================
+Runs an unmodified Pico script under CPython against the emulated
+sensors in sim/machine.py, then reports loop throughput.
+
+Run (from the repo root):
+    python sim/run.py i2c_scanner.py
+    python sim/run.py sensor_fusion.py --duration 10
+    python sim/run.py sensor_fusion.py --fast --duration 30 --profile
+    python sim/run.py mpu6050_test.py --trace glove_trace.csv
+
+--fast makes every sleep advance a virtual clock instead of blocking,
+so the script runs flat out and the report shows its raw throughput.
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import runpy
+import sys
+import time
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def main():
+    ap = argparse.ArgumentParser(description="Run a Pico script on the simulator")
+    ap.add_argument("script", help="MicroPython script to run (e.g. sensor_fusion.py)")
+    ap.add_argument("--duration", type=float, default=None,
+                    help="stop after this many simulated seconds")
+    ap.add_argument("--fast", action="store_true",
+                    help="don't block in sleep(); measure raw throughput")
+    ap.add_argument("--trace", help="CSV sensor trace to play back")
+    ap.add_argument("--seed", type=int, help="noise seed")
+    ap.add_argument("--noise", type=float, help="noise scale (0 = ideal sensors)")
+    ap.add_argument("--gyro-bias", help='gyro bias "x,y,z" in deg/s')
+    ap.add_argument("--profile", nargs="?", const="", metavar="OUT",
+                    help="profile with cProfile; optionally save stats to OUT")
+    args = ap.parse_args()
+
+    # The machine module reads its knobs at import time
+    env = {"BRAILLIE_SIM_TRACE": args.trace,
+           "BRAILLIE_SIM_SEED": args.seed,
+           "BRAILLIE_SIM_NOISE": args.noise,
+           "BRAILLIE_SIM_GYRO_BIAS": args.gyro_bias,
+           "BRAILLIE_SIM_FAST": "1" if args.fast else None}
+    for k, v in env.items():
+        if v is not None:
+            os.environ[k] = str(v)
+
+    script = os.path.abspath(args.script)
+    sys.path[:0] = [SIM_DIR, os.path.dirname(script)]
+    sys.argv = [script]
+
+    import machine
+    if args.duration:
+        machine.set_deadline(args.duration)
+
+    prof = cProfile.Profile() if args.profile is not None else None
+    start = time.perf_counter()
+    try:
+        if prof:
+            prof.enable()
+        runpy.run_path(script, run_name="__main__")
+    except (machine.SimulationEnd, KeyboardInterrupt):
+        pass
+    finally:
+        if prof:
+            prof.disable()
+    real = max(time.perf_counter() - start, 1e-9)
+    sim = max(machine.now(), 1e-9)
+
+    s = machine.stats
+    print("\n" + "=" * 45)
+    print("  Simulator report")
+    print(f"  wall time        {real:8.2f} s")
+    print(f"  simulated time   {sim:8.2f} s")
+    print(f"  I2C transactions {s['i2c_transactions']:8d}  ({s['i2c_bytes']} bytes)")
+    print(f"  MPU6050 samples  {s['mpu_samples']:8d}  "
+          f"{s['mpu_samples'] / real:8.0f}/s wall  {s['mpu_samples'] / sim:6.0f}/s simulated")
+    print(f"  QMC5883L samples {s['qmc_samples']:8d}")
+    print("=" * 45)
+
+    if prof:
+        if args.profile:
+            prof.dump_stats(args.profile)
+            print(f"Profile saved to {args.profile}")
+        pstats.Stats(prof).sort_stats("cumulative").print_stats(20)
+
+if __name__ == "__main__":
+    main()
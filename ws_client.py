@@ -0,0 +1,200 @@
+"""
+Braill'ie - GUI WebSocket Client
+=================================
+Connection to position_server.py for the GUI, on its own asyncio thread.
+
+- CommandQueue: thread-safe, bounded outbound queue that coalesces
+  redundant commands (only the last set_position / set_total /
+  start_sim-or-stop_sim is kept) and drops stale ones, so a reconnect
+  never replays a backlog.
+- Heartbeat pings measure round-trip time and force a reconnect when
+  the server stops answering.
+- On every (re)connect the server's "state" message is passed to the
+  GUI first, so it resyncs before any queued command is sent.
+
+Install:
+    pip install websockets
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import websockets
+
+# ─────────────────────────────────────────
+# OUTBOUND QUEUE
+# ─────────────────────────────────────────
+# Commands that replace any earlier queued command with the same key
+COALESCE = {
+    "set_position": "position",
+    "set_total":    "total",
+    "set_text":     "text",
+    "start_sim":    "sim",
+    "stop_sim":     "sim",
+    "calibrate":    "calibrate",
+}
+KEEP = {"set_total", "set_text"}   # never too old to send: the server needs them
+
+class CommandQueue:
+    def __init__(self, maxlen=64, max_age=10.0):
+        self.maxlen  = maxlen
+        self.max_age = max_age
+        self.items   = OrderedDict()   # key → (queued at, command)
+        self.lock    = threading.Lock()
+        self.unique  = itertools.count()
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, msg):
+        key = COALESCE.get(msg.get("cmd")) or next(self.unique)
+        with self.lock:
+            if self.items.pop(key, None) is not None:
+                self.dropped += 1
+            self.items[key] = (time.monotonic(), msg)
+            self._trim()
+
+    def put_back(self, msg, queued_at):
+        # Return an unsent command to the front, unless a newer one
+        # with the same key has been queued meanwhile
+        key = COALESCE.get(msg.get("cmd")) or next(self.unique)
+        with self.lock:
+            if key in self.items:
+                return
+            if len(self.items) >= self.maxlen and msg.get("cmd") not in KEEP:
+                return
+            self.items[key] = (queued_at, msg)
+            self.items.move_to_end(key, last=False)
+            self._trim()
+
+    def _trim(self):
+        # Over maxlen: drop the oldest commands, but never a KEEP one
+        # (coalescing means there are at most len(KEEP) of those)
+        while len(self.items) > self.maxlen:
+            for key, (_, msg) in self.items.items():
+                if msg.get("cmd") not in KEEP:
+                    del self.items[key]
+                    self.dropped += 1
+                    break
+
+    def get(self):
+        """Oldest fresh command as (queued at, command), or None."""
+        now = time.monotonic()
+        with self.lock:
+            while self.items:
+                _, (at, msg) = self.items.popitem(last=False)
+                if now - at <= self.max_age or msg.get("cmd") in KEEP:
+                    return at, msg
+                self.dropped += 1
+        return None
+
+# ─────────────────────────────────────────
+# CLIENT
+# `post(fn, *args)` must run fn on the GUI
+# thread, e.g. lambda f, *a: root.after(0, f, *a)
+# ─────────────────────────────────────────
+class WSClient:
+    def __init__(self, url, post, on_message, on_status,
+                 ping_interval=2.0, ping_timeout=5.0):
+        self.url           = url
+        self.post          = post
+        self.on_message    = on_message   # fn(dict)
+        self.on_status     = on_status    # fn(connected: bool, rtt_ms: float|None)
+        self.ping_interval = ping_interval
+        self.ping_timeout  = ping_timeout
+        self.queue         = CommandQueue()
+        self.loop          = None
+        self.wake          = None
+        self.connected     = False
+        self.rtt           = None         # last round-trip time, seconds
+
+    def start(self):
+        threading.Thread(target=self._thread, daemon=True).start()
+
+    def send(self, msg):
+        """Queue a command; safe to call from any thread."""
+        self.queue.put(msg)
+        if self.loop and self.wake:
+            self.loop.call_soon_threadsafe(self.wake.set)
+
+    def _thread(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._run())
+
+    async def _run(self):
+        self.wake = asyncio.Event()
+        backoff = 0.5
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=None) as ws:
+                    backoff = 0.5
+                    await self._session(ws)
+            except (OSError, asyncio.TimeoutError, ValueError,
+                    websockets.exceptions.WebSocketException):
+                pass   # ValueError: greeting wasn't JSON; retry like any failure
+            if self.connected:
+                self.connected = False
+                self.rtt = None
+                self.post(self.on_status, False, None)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 5.0)
+
+    async def _session(self, ws):
+        # Resync: the server greets every connection with its state
+        first = json.loads(await asyncio.wait_for(ws.recv(), self.ping_timeout))
+        self.post(self.on_message, first)
+        self.connected = True
+        self.post(self.on_status, True, None)
+
+        tasks = [asyncio.create_task(c) for c in
+                 (self._receiver(ws), self._sender(ws), self._heartbeat(ws))]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                t.result()   # re-raise why the session ended
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    async def _receiver(self, ws):
+        async for raw in ws:
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                continue   # not ours; don't let it kill the client thread
+            self.post(self.on_message, data)
+
+    async def _sender(self, ws):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.wake.clear()
+                if len(self.queue):
+                    continue   # raced with a send() between get and clear
+                await self.wake.wait()
+                continue
+            at, msg = item
+            try:
+                await ws.send(json.dumps(msg))
+            except websockets.exceptions.ConnectionClosed:
+                self.queue.put_back(msg, at)
+                raise
+
+    async def _heartbeat(self, ws):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            t0 = time.perf_counter()
+            pong = await ws.ping()
+            try:
+                await asyncio.wait_for(pong, self.ping_timeout)
+            except asyncio.TimeoutError:
+                await ws.close()   # server stopped answering: reconnect
+                return
+            self.rtt = time.perf_counter() - t0
+            self.post(self.on_status, True, self.rtt * 1000)